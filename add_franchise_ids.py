@@ -0,0 +1,16 @@
+from migrations import DB_PATH, connect, migrate
+
+# Adding and backfilling player_teams.franchise_id is migration 3 in
+# migrations.py, its covering indexes are part of migration 4
+conn = connect(DB_PATH)
+for version, description in migrate(conn):
+    print(f"Applied migration {version}: {description}")
+
+cursor = conn.cursor()
+cursor.execute("SELECT COUNT(*) FROM player_teams WHERE franchise_id IS NULL")
+missing = cursor.fetchone()[0]
+conn.close()
+
+print("Backfilled franchise_id")
+if missing:
+    print(f"⚠️ {missing} player_teams rows reference unknown team_ids")
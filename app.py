@@ -2,21 +2,34 @@ print("Starting app...")
 
 from flask import Flask, request, render_template_string
 
+from graph_snapshot import load_snapshot
+from season_bitmask import SeasonHistory
+
 app = Flask(__name__)
 
 # Mock player data — replace this with your real parsed data
-player_team_data = {
+# Loaded once at startup into one season bitmask per player per team
+player_team_data = SeasonHistory.from_team_years({
     "LeBron James": {"CLE": ["2003-04", "2004-05"], "MIA": ["2010-11", "2011-12"]},
     "Kevin Durant": {"OKC": ["2008-09", "2009-10"], "GSW": ["2016-17", "2017-18"]},
     "Stephen Curry": {"GSW": ["2009-10", "2010-11", "2011-12"]}
-}
+})
+
+# Real teammate graph, mmap'd and shared across workers when a snapshot has been built
+snapshot = load_snapshot()
 
 def were_teammates(player1, player2, data):
-    if player1 not in data or player2 not in data:
-        return False
-    p1 = {(team, year) for team, years in data[player1].items() for year in years}
-    p2 = {(team, year) for team, years in data[player2].items() for year in years}
-    return len(p1 & p2) > 0
+    return data.were_teammates(player1, player2)
+
+def player_known(name):
+    if snapshot is not None:
+        return snapshot.find_player(name) is not None
+    return name in player_team_data
+
+def check_teammates(player1, player2):
+    if snapshot is not None:
+        return snapshot.graph.are_teammates(snapshot.find_player(player1), snapshot.find_player(player2))
+    return were_teammates(player1, player2, player_team_data)
 
 # HTML template as a string (small, so no separate file needed)
 HTML_PAGE = """
@@ -51,12 +64,12 @@ def home():
         player1 = request.form.get("player1").strip()
         player2 = request.form.get("player2").strip()
 
-        if player1 not in player_team_data:
+        if not player_known(player1):
             message = f"Player '{player1}' not found."
-        elif player2 not in player_team_data:
+        elif not player_known(player2):
             message = f"Player '{player2}' not found."
         else:
-            if were_teammates(player1, player2, player_team_data):
+            if check_teammates(player1, player2):
                 message = f"Yes! {player1} and {player2} were teammates."
             else:
                 message = f"No, {player1} and {player2} were never teammates."
@@ -0,0 +1,90 @@
+# batch_teammates.py
+#
+# Vectorized teammate checks for many (player, candidate) pairs at once.
+# Both functions run over the same arrays TeammateGraph (game_test) and
+# StintIndex (game_test2) use, so the answers match the single-pair checks:
+#
+#   season_teammates(graph, a, b)  -> shared (franchise, season) count per pair
+#   stint_teammates(stints, a, b)  -> overlapping stint pair count per pair
+#
+# Each returns (is_teammate bool array, overlap count array).
+
+import numpy as np
+
+CHUNK_SIZE = 100_000
+
+
+def _dense(sorted_ids, ids):
+    # Positions of ids in sorted_ids, plus a mask of which were found
+    sorted_ids = np.asarray(sorted_ids, dtype=np.int64)
+    if len(sorted_ids) == 0:
+        return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return pos, sorted_ids[pos] == ids
+
+
+def _expand(lengths):
+    # For run lengths [2, 0, 3] -> owners [0, 0, 2, 2, 2], ranks [0, 1, 0, 1, 2]
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    ranks = np.arange(len(owners)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owners, ranks
+
+
+def _chunked(fn, a, b, chunk_size):
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    if a.shape != b.shape:
+        raise ValueError("player id arrays must have the same shape")
+    counts = np.concatenate(
+        [fn(a[i:i + chunk_size], b[i:i + chunk_size]) for i in range(0, len(a), chunk_size)]
+        or [np.zeros(0, dtype=np.int64)]
+    )
+    return counts > 0, counts
+
+
+def season_teammates(graph, a, b, chunk_size=CHUNK_SIZE):
+    group_offsets = np.asarray(graph.group_offsets, dtype=np.int64)
+    groups = np.asarray(graph.groups, dtype=np.int64)
+    n_groups = max(len(graph.group_keys), 1)
+    # (player index, group) keys; sorted because both levels of the CSR are sorted
+    member_keys = np.repeat(np.arange(len(group_offsets) - 1), np.diff(group_offsets)) * n_groups + groups
+
+    def count(a, b):
+        ia, found_a = _dense(graph.player_ids, a)
+        ib, found_b = _dense(graph.player_ids, b)
+        valid = found_a & found_b & (a != b)  # get_teammates excludes the player
+        starts = group_offsets[ia]
+        lengths = np.where(valid, group_offsets[ia + 1] - starts, 0)
+        owners, ranks = _expand(lengths)
+        query = ib[owners] * n_groups + groups[starts[owners] + ranks]
+        pos = np.minimum(np.searchsorted(member_keys, query), max(len(member_keys) - 1, 0))
+        hit = member_keys[pos] == query if len(member_keys) else np.zeros(len(query), dtype=bool)
+        return np.bincount(owners[hit], minlength=len(a))
+
+    return _chunked(count, a, b, chunk_size)
+
+
+def stint_teammates(stints, a, b, chunk_size=CHUNK_SIZE):
+    player_offsets = np.asarray(stints.player_offsets, dtype=np.int64)
+    player_stints = np.asarray(stints.player_stints, dtype=np.int64)
+    teams = np.asarray(stints.stint_teams, dtype=np.int64)
+    starts = np.asarray(stints.starts, dtype=np.int64)
+    ends = np.asarray(stints.ends, dtype=np.int64)
+
+    def count(a, b):
+        ia, found_a = _dense(stints.player_ids, a)
+        ib, found_b = _dense(stints.player_ids, b)
+        valid = found_a & found_b
+        start_a, start_b = player_offsets[ia], player_offsets[ib]
+        len_a = np.where(valid, player_offsets[ia + 1] - start_a, 0)
+        len_b = np.where(valid, player_offsets[ib + 1] - start_b, 0)
+        # Every stint of a against every stint of b, like the old self-join
+        owners, ranks = _expand(len_a * len_b)
+        pos_a = player_stints[start_a[owners] + ranks // len_b[owners]]
+        pos_b = player_stints[start_b[owners] + ranks % len_b[owners]]
+        overlap = ((teams[pos_a] == teams[pos_b])
+                   & (starts[pos_a] <= ends[pos_b])
+                   & (ends[pos_a] >= starts[pos_b]))
+        return np.bincount(owners[overlap], minlength=len(a))
+
+    return _chunked(count, a, b, chunk_size)
@@ -0,0 +1,99 @@
+# check_migration.py
+#
+# End-to-end check for migrate_tables.py against a scratch Postgres schema
+# (a local server is enough). Copies a SQLite db in small chunks, stops the
+# first run after one chunk per table, resumes it from the checkpoints, re-runs
+# it to check the merge is idempotent, and compares every row with SQLite.
+#
+#   python check_migration.py postgresql://localhost/postgres [sqlite_db]
+
+import sqlite3
+import sys
+
+import psycopg2
+
+from migrate_tables import SQLITE_DB_PATH, TABLES, migrate
+
+SCHEMA = "migration_check"
+TABLES_DDL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.players (
+        player_id INTEGER PRIMARY KEY,
+        player_name TEXT NOT NULL
+    );
+    CREATE TABLE {SCHEMA}.player_team_stints (
+        player_id INTEGER NOT NULL,
+        team_abbr TEXT NOT NULL,
+        stint_number INTEGER NOT NULL,
+        start_season INTEGER NOT NULL,
+        end_season INTEGER NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        PRIMARY KEY (player_id, team_abbr, stint_number)
+    );
+"""
+
+
+def sqlite_rows(sqlite_path, table, keys, columns):
+    conn = sqlite3.connect(sqlite_path)
+    rows = conn.execute(f"SELECT {', '.join(columns.values())} FROM {table} ORDER BY {', '.join(keys)}").fetchall()
+    conn.close()
+    return [tuple(map(str, row)) for row in rows]
+
+
+def postgres_rows(pg_conn, table, keys, columns):
+    cur = pg_conn.cursor()
+    cur.execute(f"SELECT {', '.join(columns)} FROM {SCHEMA}.{table} ORDER BY {', '.join(keys)}")
+    return [tuple(map(str, row)) for row in cur.fetchall()]
+
+
+def main(pg_url, sqlite_path=SQLITE_DB_PATH):
+    pg_conn = psycopg2.connect(pg_url)
+    pg_conn.cursor().execute(TABLES_DDL)
+    pg_conn.commit()
+    scratch_url = pg_url + ('&' if '?' in pg_url else '?') + f"options=-csearch_path%3D{SCHEMA}"
+
+    expected = {table: sqlite_rows(sqlite_path, table, keys, columns) for table, keys, columns in TABLES}
+    # At least three chunks per table, so the first run stops partway
+    chunk_rows = max(1, min(len(rows) for rows in expected.values()) // 3)
+    problems = []
+
+    first = migrate(sqlite_path, scratch_url, chunk_rows=chunk_rows, max_chunks=1)
+    for table, result in first.items():
+        if isinstance(result, Exception):
+            raise result
+        if len(expected[table]) > chunk_rows and result != (chunk_rows, False):
+            problems.append(f"{table}: first run should stop after one chunk, got {result}")
+    print(f"⏸️ Interrupted run: {first}")
+
+    for label in ("resumed run", "repeat run"):
+        results = migrate(sqlite_path, scratch_url, chunk_rows=chunk_rows)
+        print(f"▶️ {label}: {results}")
+        for table, keys, columns in TABLES:
+            if isinstance(results[table], Exception):
+                raise results[table]
+            if postgres_rows(pg_conn, table, keys, columns) != expected[table]:
+                problems.append(f"{table}: rows differ from SQLite after the {label}")
+
+    cur = pg_conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM {SCHEMA}.migration_checkpoints")
+    if cur.fetchone()[0]:
+        problems.append("checkpoints left behind after a finished run")
+    cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    pg_conn.commit()
+    pg_conn.close()
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print(f"Checked {', '.join(f'{t}: {len(rows)} rows' for t, rows in expected.items())} "
+          f"in chunks of {chunk_rows}: {len(problems)} problems")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python check_migration.py <postgres_url> [sqlite_db]")
+        sys.exit(2)
+    main(*sys.argv[1:3])
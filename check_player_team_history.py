@@ -1,11 +1,10 @@
-import json
+from team_history import iter_history
 
-with open('player_team_history.json', 'r') as f:
-    data = json.load(f)
-
-print(f"Total players: {len(data)}")
-
-for entry in data[:10]:
+total = 0
+for entry in iter_history():
+    total += 1
+    if total > 10:
+        continue
     player = entry.get('player_name', 'Unknown')
     teams = entry.get('teams', [])
     print(f"{player}:")
@@ -14,3 +13,5 @@ for entry in data[:10]:
             print(f"  - {team}")
     else:
         print("  No teams found.")
+
+print(f"Total players: {total}")
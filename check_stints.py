@@ -0,0 +1,180 @@
+# check_stints.py
+#
+# Regression check for stint_scraper.detect_stints. Every PlayerGameLog
+# fixture in fixtures/game_logs (a raw response plus the stints it must give:
+# a mid-season trade, unknown-team games, a return to a former team) runs
+# through the vectorized detect_stints and the original row-by-row loop (kept
+# below). Game logs recorded in the ResponseCache, if any, are compared
+# against the loop too. The speedup is always reported: over the fixtures,
+# each tiled to a career-length log (a few games alone time only pandas'
+# overhead), and over the cached logs when there are any.
+#
+# Unknown-team games: the loop stores NaN, and NaN never equals the previous
+# team, so every such game is its own stint; detect_stints reproduces that
+# with team_abbr None. The fixtures pin both halves.
+#
+#   python check_stints.py [max_cached_logs]
+
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+import pandas as pd
+
+from nba_fetch import GAME_LOG, get_cache, result_frame
+from stint_scraper import GAME_DATE_FORMAT, detect_stints
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'game_logs')
+CAREER_COPIES = 100  # fixture copies per timed log: several hundred games, a real career
+FIXTURE_REPEATS = 5
+
+
+def detect_stints_loop(df):
+    # Original iterrows implementation, the reference output
+    if df is None or df.empty:
+        return []
+
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format='mixed')
+    df.sort_values("GAME_DATE", inplace=True)
+
+    df["TEAM_ABBR"] = df["MATCHUP"].apply(lambda m: m.split(" ")[0] if "vs." in m or "@" in m else None)
+
+    team_stints = []
+    last_team = None
+    prev_game_date = None
+    prev_season = None
+
+    for idx, row in df.iterrows():
+        team = row["TEAM_ABBR"]
+        game_date = row["GAME_DATE"]
+        season_id = str(row["SEASON_ID"])[-4:]
+
+        if team != last_team:
+            if last_team is not None and team_stints:
+                team_stints[-1]["end_date"] = prev_game_date.strftime("%Y-%m-%d")
+                team_stints[-1]["end_season"] = prev_season
+            team_stints.append({
+                "team_abbr": team,
+                "start_date": game_date.strftime("%Y-%m-%d"),
+                "start_season": season_id,
+                "end_date": None,
+                "end_season": None
+            })
+            last_team = team
+        prev_game_date = game_date
+        prev_season = season_id
+
+    if team_stints and prev_game_date:
+        team_stints[-1]["end_date"] = prev_game_date.strftime("%Y-%m-%d")
+        team_stints[-1]["end_season"] = prev_season
+
+    return team_stints
+
+
+def load_fixtures():
+    # -> [(name, game log frame, expected stints)]
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.json'))):
+        with open(path) as f:
+            fixture = json.load(f)
+        name = os.path.splitext(os.path.basename(path))[0]
+        fixtures.append((name, result_frame(fixture['response']), fixture['expected_stints']))
+    return fixtures
+
+
+def check_unknown_teams(expected, reference):
+    # The loop must still give NaN (not None, which would merge back-to-back
+    # unknown games) wherever detect_stints gives None
+    if len(expected) != len(reference):
+        return False
+    return all(
+        isinstance(ref['team_abbr'], float) and math.isnan(ref['team_abbr'])
+        for stint, ref in zip(expected, reference) if stint['team_abbr'] is None
+    )
+
+
+def normalize(stints):
+    # The loop leaves NaN for unknown teams where detect_stints gives None
+    for stint in stints:
+        if pd.isna(stint["team_abbr"]):
+            stint["team_abbr"] = None
+    return stints
+
+
+def career_length(df, copies=CAREER_COPIES):
+    # The fixture's games repeated every few years, for timing at a real log's size
+    dates = pd.to_datetime(df["GAME_DATE"], format=GAME_DATE_FORMAT)
+    span = dates.dt.year.max() - dates.dt.year.min() + 2
+    shifted = []
+    for i in range(copies):
+        copy = df.copy()
+        copy["GAME_DATE"] = (dates + pd.DateOffset(years=i * span)).dt.strftime(GAME_DATE_FORMAT).str.upper()
+        copy["SEASON_ID"] = (copy["SEASON_ID"].astype(int) + i * span).astype(str)
+        shifted.append(copy)
+    return pd.concat(shifted, ignore_index=True)
+
+
+def time_runs(frames, repeats=1):
+    # -> (loop seconds, vectorized seconds, ids whose stints differ from the loop)
+    loop_time = fast_time = 0.0
+    differ = []
+    for key, df in frames:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            expected = normalize(detect_stints_loop(df.copy()))
+            loop_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = detect_stints(df.copy())
+            fast_time += time.perf_counter() - started
+        if actual != expected:
+            differ.append(key)
+    return loop_time, fast_time, differ
+
+
+def report_speed(label, loop_time, fast_time):
+    print(f"{label}: iterrows {loop_time:.2f}s  vectorized {fast_time:.2f}s  "
+          f"speedup {loop_time / max(fast_time, 1e-9):.1f}x")
+
+
+def main(max_logs=None):
+    problems = []
+    fixtures = load_fixtures()
+    if not fixtures:
+        print(f"❌ No game log fixtures in {FIXTURES_DIR}")
+        sys.exit(1)
+    for name, df, expected in fixtures:
+        if detect_stints(df.copy()) != expected:
+            problems.append(f"{name}: detect_stints differs from the expected stints")
+        reference = detect_stints_loop(df.copy())
+        if not check_unknown_teams(expected, reference):
+            problems.append(f"{name}: the reference loop no longer gives NaN for unknown teams")
+        if normalize(reference) != expected:
+            problems.append(f"{name}: the reference loop differs from the expected stints")
+    # Fixtures are a few games each; time them tiled to a career's length
+    fixture_times = time_runs([(name, career_length(df)) for name, df, _ in fixtures], FIXTURE_REPEATS)
+    problems += [f"{name}: tiled to a career, stints differ from the loop" for name in fixture_times[2]]
+
+    frames = []
+    for params, raw in get_cache().entries(GAME_LOG):
+        if max_logs and len(frames) >= max_logs:
+            break
+        frames.append((params['player_id'], result_frame(raw)))
+    loop_time, fast_time, differ = time_runs(frames)
+    problems += [f"cached game log for player {player_id}: stints differ from the loop" for player_id in differ]
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print(f"Checked {len(fixtures)} fixtures and {len(frames)} cached game logs: {len(problems)} problems")
+    report_speed(f"fixtures tiled x{CAREER_COPIES}, run x{FIXTURE_REPEATS}", *fixture_times[:2])
+    if frames:
+        report_speed("cached game logs", loop_time, fast_time)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,112 @@
+# check_sync.py
+#
+# End-to-end check for sync_postgres.py against a scratch Postgres schema.
+# Works on a copy of the SQLite db: the first sync is a full copy, then an
+# insert, an update, a delete and a key change are synced, and the check
+# confirms only those rows were shipped, Postgres matches SQLite, and the
+# changelog was pruned. Last, a rebuilt database (new sync_source id, fewer
+# players, renumbered stints) gets a full copy that must drop the rows it no
+# longer has.
+#
+#   python check_sync.py postgresql://localhost/postgres [sqlite_db]
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import psycopg2
+
+from check_migration import SCHEMA, TABLES_DDL, postgres_rows, sqlite_rows
+from migrate_tables import SQLITE_DB_PATH, TABLES
+from sync_postgres import sync
+
+
+def main(pg_url, sqlite_path=SQLITE_DB_PATH):
+    pg_conn = psycopg2.connect(pg_url)
+    pg_conn.cursor().execute(TABLES_DDL)
+    pg_conn.commit()
+    scratch_url = pg_url + ('&' if '?' in pg_url else '?') + f"options=-csearch_path%3D{SCHEMA}"
+    work_dir = tempfile.mkdtemp()
+    db_path = os.path.join(work_dir, "sync_check.db")
+    shutil.copy(sqlite_path, db_path)
+    problems = []
+
+    def compare(label):
+        for table, keys, columns in TABLES:
+            if postgres_rows(pg_conn, table, keys, columns) != sqlite_rows(db_path, table, keys, columns):
+                problems.append(f"{table}: rows differ from SQLite after the {label}")
+
+    stats = sync(db_path, scratch_url)
+    print(f"🆕 First sync: {stats}")
+    if not stats.get('full_copy'):
+        problems.append("first sync should be a full copy")
+    compare("first sync")
+
+    conn = sqlite3.connect(db_path)
+    player_id, = conn.execute("SELECT MAX(player_id) FROM players").fetchone()
+    stints = conn.execute(
+        "SELECT player_id, team_abbr, stint_number FROM player_team_stints ORDER BY player_id LIMIT 3"
+    ).fetchall()
+    conn.execute("INSERT INTO players (player_id, player_name) VALUES (?, 'Sync Check')", (player_id + 1,))
+    conn.execute("UPDATE player_team_stints SET end_day = end_day + 1 "
+                 "WHERE player_id = ? AND team_abbr = ? AND stint_number = ?", stints[0])
+    conn.execute("DELETE FROM player_team_stints "
+                 "WHERE player_id = ? AND team_abbr = ? AND stint_number = ?", stints[1])
+    conn.execute("UPDATE player_team_stints SET stint_number = stint_number + 100 "
+                 "WHERE player_id = ? AND team_abbr = ? AND stint_number = ?", stints[2])
+    conn.commit()
+
+    stats = sync(db_path, scratch_url)
+    print(f"🔄 Incremental sync: {stats}")
+    # new player, updated stint, renumbered stint / deleted stint, old key of the renumbered one
+    if (stats['upserted'], stats['deleted']) != (3, 2):
+        problems.append(f"expected 3 upserts and 2 deletes, got {stats['upserted']} and {stats['deleted']}")
+    compare("incremental sync")
+
+    stats = sync(db_path, scratch_url)
+    if stats['batches']:
+        problems.append(f"a sync with no changes shipped {stats['batches']} batches")
+    if conn.execute("SELECT COUNT(*) FROM sync_changes").fetchone()[0]:
+        problems.append("acknowledged changes were not pruned")
+
+    # Stand-in for rebuild_db: a new database identity with rows gone and renumbered
+    conn.execute("DELETE FROM sync_source")
+    conn.execute("INSERT INTO sync_source (id) VALUES (lower(hex(randomblob(16))))")
+    gone = [row[0] for row in conn.execute("SELECT player_id FROM players ORDER BY player_id DESC LIMIT 5")]
+    conn.execute(f"DELETE FROM player_team_stints WHERE player_id IN ({', '.join('?' * len(gone))})", gone)
+    conn.execute(f"DELETE FROM players WHERE player_id IN ({', '.join('?' * len(gone))})", gone)
+    renumbered = conn.execute(
+        "SELECT player_id FROM player_team_stints GROUP BY player_id HAVING COUNT(*) > 1 LIMIT 3"
+    ).fetchall()
+    conn.executemany("UPDATE player_team_stints SET stint_number = stint_number + 1000 WHERE player_id = ?",
+                     renumbered)
+    conn.execute("DELETE FROM sync_changes")
+    conn.commit()
+    conn.close()
+
+    stats = sync(db_path, scratch_url)
+    print(f"🏗️ Sync after a rebuild: {stats}")
+    if not stats.get('full_copy'):
+        problems.append("a rebuilt database should get a full copy")
+    compare("sync after a rebuild")
+
+    cur = pg_conn.cursor()
+    cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    pg_conn.commit()
+    pg_conn.close()
+    shutil.rmtree(work_dir)
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print(f"Checked full, incremental, empty and post-rebuild syncs: {len(problems)} problems")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python check_sync.py <postgres_url> [sqlite_db]")
+        sys.exit(2)
+    main(*sys.argv[1:3])
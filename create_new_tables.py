@@ -1,38 +1,9 @@
-import sqlite3
-
-conn = sqlite3.connect('nba_players.db')
-cursor = conn.cursor()
-
-# Create teams table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS teams (
-    team_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    team_abbr TEXT UNIQUE NOT NULL,
-    team_name TEXT NOT NULL
-)
-''')
-
-# Create players table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS players (
-    player_id INTEGER PRIMARY KEY,
-    player_name TEXT NOT NULL
-)
-''')
-
-# Create player_teams join table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS player_teams (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    player_id INTEGER NOT NULL,
-    team_id INTEGER NOT NULL,
-    season TEXT NOT NULL,
-    UNIQUE(player_id, team_id, season),
-    FOREIGN KEY(player_id) REFERENCES players(player_id),
-    FOREIGN KEY(team_id) REFERENCES teams(team_id)
-)
-''')
-
-conn.commit()
+from migrations import DB_PATH, check_query_plans, connect, migrate, schema_version
+
+# The schema lives in migrations.py; this just brings nba_players.db up to date
+conn = connect(DB_PATH)
+for version, description in migrate(conn):
+    print(f"Applied migration {version}: {description}")
+check_query_plans(conn)
+print(f"Tables created (schema version {schema_version(conn)})")
 conn.close()
-print("Tables created")
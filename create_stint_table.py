@@ -1,19 +1,7 @@
-import sqlite3
+from migrations import DB_PATH, connect, migrate
 
-conn = sqlite3.connect('nba_players.db')
-cursor = conn.cursor()
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS player_team_stints (
-    player_id INTEGER NOT NULL,
-    team_abbr TEXT NOT NULL,
-    start_season TEXT NOT NULL,
-    end_season TEXT NOT NULL,
-    start_date TEXT NOT NULL,
-    end_date TEXT NOT NULL,
-    PRIMARY KEY (player_id, team_abbr)
-''')
-
-conn.commit()
+# player_team_stints (with stint_number) is migration 2 in migrations.py
+conn = connect(DB_PATH)
+migrate(conn, target=2)
 conn.close()
 print("Table created")
@@ -1,17 +1,8 @@
-import sqlite3
+from migrations import DB_PATH, connect, migrate
 
-conn = sqlite3.connect('nba_players.db')
-cursor = conn.cursor()
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS teams (
-    team_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    team_abbr TEXT UNIQUE NOT NULL,
-    team_name TEXT NOT NULL
-)
-''')
-
-conn.commit()
+# teams is part of the first migration in migrations.py
+conn = connect(DB_PATH)
+migrate(conn, target=1)
 conn.close()
 
 print("Teams table created successfully.")
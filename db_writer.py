@@ -0,0 +1,220 @@
+# db_writer.py
+#
+# Shared write layer for the scrapers. Team and player ids are cached in
+# memory, so no row needs a SELECT before its INSERT. Rows are buffered and
+# written with executemany, and commits happen every commit_every rows
+# instead of once per player.
+#
+# WriterThread puts one BulkWriter on its own thread and connection (the
+# migrations.connect profile: WAL, NORMAL sync, big page cache; migrated on open),
+# fed through a queue, so any number of fetch/parse workers can hand it rows
+# without contending for the database.
+
+import queue
+import threading
+import time
+
+from franchises import normalize_team_id
+from migrations import connect, migrate
+from season_bitmask import season_start_year
+from stint_index import to_day
+
+COMMIT_EVERY = 5000  # rows per transaction
+QUEUE_SIZE = 1000  # submitted batches waiting for the writer thread
+IDLE_COMMIT = 1.0  # seconds without new work before a partial transaction commits
+
+_STOP = object()
+
+PLAYER_SQL = "INSERT OR IGNORE INTO players (player_id, player_name) VALUES (?, ?)"
+PLAYER_TEAM_SQL = ("INSERT OR IGNORE INTO player_teams (player_id, team_id, season, franchise_id) "
+                   "VALUES (?, ?, ?, ?)")
+STINT_SQL = """
+    INSERT OR IGNORE INTO player_team_stints
+    (player_id, team_abbr, stint_number, start_season, end_season, start_day, end_day)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+EXTEND_STINT_SQL = """
+    UPDATE player_team_stints SET end_day = ?, end_season = ?
+    WHERE player_id = ? AND team_abbr = ? AND stint_number = ?
+"""
+
+
+def stint_row(player_id, stint_number, stint):
+    # detect_stints gives ISO dates and season strings; the table stores integers
+    return (
+        player_id,
+        stint["team_abbr"],
+        stint_number,
+        season_start_year(stint["start_season"]),
+        season_start_year(stint["end_season"]),
+        to_day(stint["start_date"]),
+        to_day(stint["end_date"])
+    )
+
+
+class BulkWriter:
+    def __init__(self, conn, commit_every=COMMIT_EVERY):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.commit_every = commit_every
+        self.pending = 0
+        self.rows_written = 0
+        self.commits = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+        # Insertion order matters: players before the rows that reference them
+        self.buffers = {PLAYER_SQL: [], PLAYER_TEAM_SQL: [], STINT_SQL: []}
+
+        self.cursor.execute("SELECT team_abbr, team_id FROM teams")
+        self.team_ids = dict(self.cursor.fetchall())
+        self.cursor.execute("SELECT player_id FROM players")
+        self.player_ids = {row[0] for row in self.cursor.fetchall()}
+
+    def team_id(self, team_abbr, team_full_name):
+        team_id = self.team_ids.get(team_abbr)
+        if team_id is None:
+            # A few dozen teams ever; insert right away to get the id
+            self.cursor.execute(
+                "INSERT INTO teams (team_abbr, team_name) VALUES (?, ?)",
+                (team_abbr, team_full_name)
+            )
+            team_id = self.team_ids[team_abbr] = self.cursor.lastrowid
+        return team_id
+
+    def add(self, sql, row):
+        self.buffers.setdefault(sql, []).append(row)
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def add_player(self, player_id, player_name):
+        if player_id not in self.player_ids:
+            self.player_ids.add(player_id)
+            self.add(PLAYER_SQL, (player_id, player_name))
+
+    def add_player_team(self, player_id, team_abbr, team_full_name, season):
+        team_id = self.team_id(team_abbr, team_full_name)
+        self.add(PLAYER_TEAM_SQL, (player_id, team_id, season, normalize_team_id(team_abbr)))
+
+    def add_stints(self, player_id, team_stints, first_number=1):
+        for i, stint in enumerate(team_stints):
+            self.add(STINT_SQL, stint_row(player_id, first_number + i, stint))
+
+    def extend_stint(self, player_id, team_abbr, stint_number, end_date, end_season):
+        self.add(EXTEND_STINT_SQL, (to_day(end_date), season_start_year(end_season),
+                                    player_id, team_abbr, stint_number))
+
+    def flush(self):
+        for sql, rows in self.buffers.items():
+            if rows:
+                self.cursor.executemany(sql, rows)
+                self.rows_written += len(rows)
+                rows.clear()
+        self.pending = 0
+
+    def commit(self):
+        started = time.perf_counter()
+        self.flush()
+        self.conn.commit()
+        elapsed = time.perf_counter() - started
+        self.commits += 1
+        self.commit_seconds += elapsed
+        self.max_commit_seconds = max(self.max_commit_seconds, elapsed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.conn.rollback()
+
+
+class WriterThread(threading.Thread):
+    def __init__(self, db_path, commit_every=COMMIT_EVERY, queue_size=QUEUE_SIZE):
+        super().__init__(name='db-writer', daemon=True)
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self.queue = queue.Queue(queue_size)
+        self.max_queued = 0
+        self.batches = 0
+        self.error = None
+        self.writer = None
+        self._ready = threading.Event()
+
+    def submit(self, fn, *args):
+        # fn(writer, *args) runs on the writer thread against its BulkWriter.
+        # Blocks when the queue is full, so slow commits push back on the workers.
+        if self.error:
+            raise self.error
+        self.queue.put((fn, args))
+        self.max_queued = max(self.max_queued, self.queue.qsize())
+
+    def run(self):
+        conn = connect(self.db_path)
+        try:
+            migrate(conn)
+            self.writer = BulkWriter(conn, self.commit_every)
+        except Exception as e:
+            self.error = e
+            conn.close()
+            self._ready.set()
+            return
+        self._ready.set()
+        stopped = False
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=IDLE_COMMIT)
+                except queue.Empty:
+                    if self.writer.pending:
+                        self.writer.commit()
+                    continue
+                if item is _STOP:
+                    stopped = True
+                    break
+                fn, args = item
+                fn(self.writer, *args)
+                self.batches += 1
+            self.writer.commit()
+        except Exception as e:
+            self.error = e
+            conn.rollback()
+            # Keep draining so submitters blocked on a full queue don't hang
+            while not stopped:
+                stopped = self.queue.get() is _STOP
+        finally:
+            conn.close()
+
+    def start(self):
+        super().start()
+        self._ready.wait()
+        if self.error:
+            raise self.error
+        return self
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.join()
+        if self.error:
+            raise self.error
+
+    def stats(self):
+        writer = self.writer
+        commits = writer.commits if writer else 0
+        return {
+            "queued": self.queue.qsize(),
+            "max_queued": self.max_queued,
+            "batches": self.batches,
+            "rows": writer.rows_written if writer else 0,
+            "commits": commits,
+            "avg_commit_ms": round(1000 * writer.commit_seconds / commits, 1) if commits else 0,
+            "max_commit_ms": round(1000 * writer.max_commit_seconds, 1) if writer else 0,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
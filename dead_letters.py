@@ -0,0 +1,92 @@
+# dead_letters.py
+#
+# Failed fetches, kept in nba_players.db so they can be retried on their own
+# instead of by rescanning every player. Each entry records why it failed,
+# how many times, and when it may be tried again (backoff doubles per attempt).
+# Current players sort first: their data is the one people notice missing.
+#
+# Entries are added and resolved through the run's BulkWriter by JobJournal,
+# so they commit together with the player's rows. retry_failed.py drains them.
+# The dead_letters table is created by migrations.py.
+
+import time
+
+from nba_api.stats.static import players
+
+RETRY_BASE = 15 * 60  # seconds before the first retry
+RETRY_MAX = 7 * 24 * 60 * 60
+PRIORITY_ACTIVE = 1
+PRIORITY_RETIRED = 0
+
+ADD_SQL = """
+    INSERT INTO dead_letters (job, player_id, reason, error, attempts, priority, failed_at, next_eligible_at)
+    VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT (job, player_id) DO UPDATE SET
+        reason = excluded.reason,
+        error = excluded.error,
+        attempts = attempts + 1,
+        failed_at = excluded.failed_at,
+        next_eligible_at = excluded.failed_at + MIN(?, ? * (1 << MIN(attempts, 20)))
+"""
+RESOLVE_SQL = "DELETE FROM dead_letters WHERE job = ? AND player_id = ?"
+
+
+def failure_reason(error):
+    # A short machine-readable bucket for the error
+    status = getattr(error, 'code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429:
+        return 'rate_limited'
+    if isinstance(status, int):
+        return f'http_{status}'
+    name = type(error).__name__
+    if isinstance(error, TimeoutError) or 'Timeout' in name:
+        return 'timeout'
+    # Before OSError: requests' JSON errors are both
+    if isinstance(error, (ValueError, KeyError, IndexError, TypeError)):
+        return 'bad_response'
+    if isinstance(error, OSError) or 'Connection' in name:
+        return 'network'
+    return name
+
+
+def player_priority(player_id):
+    player = players.find_player_by_id(player_id)
+    return PRIORITY_ACTIVE if player and player['is_active'] else PRIORITY_RETIRED
+
+
+class DeadLetterQueue:
+    def __init__(self, conn):
+        # The table comes from migrations.py; callers migrate() before this
+        self.conn = conn
+        self.queued = set(conn.execute("SELECT job, player_id FROM dead_letters").fetchall())
+
+    def add(self, writer, job, player_id, error):
+        now = time.time()
+        self.queued.add((job, player_id))
+        writer.add(ADD_SQL, (
+            job, player_id, failure_reason(error), str(error)[:500], player_priority(player_id),
+            now, now + RETRY_BASE, RETRY_MAX, RETRY_BASE
+        ))
+
+    def resolve(self, writer, job, player_id):
+        if (job, player_id) in self.queued:
+            self.queued.discard((job, player_id))
+            writer.add(RESOLVE_SQL, (job, player_id))
+
+    def eligible(self, jobs=None, limit=None, now=None):
+        # (job, player_id, reason, attempts) ready for a retry, highest priority first
+        sql = "SELECT job, player_id, reason, attempts FROM dead_letters WHERE next_eligible_at <= ?"
+        params = [now or time.time()]
+        if jobs:
+            sql += f" AND job IN ({', '.join('?' * len(jobs))})"
+            params += list(jobs)
+        sql += " ORDER BY priority DESC, next_eligible_at"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def summary(self):
+        return self.conn.execute(
+            "SELECT job, reason, COUNT(*), MAX(attempts) FROM dead_letters GROUP BY job, reason ORDER BY job, reason"
+        ).fetchall()
@@ -0,0 +1,157 @@
+# delta_ingest.py
+#
+# Nightly refresh: only fetch players whose data can have changed since the
+# last run, instead of re-walking all ~4,000 players.
+#
+#   - players missing from the db get their full career (career stats + game log)
+#   - active players, and anyone who played last season, get career stats
+#     (only seasons >= their last stored season are written) and just the
+#     current season's game log, which is merged onto their last stored stint
+#
+# Every request bypasses the ResponseCache's TTL (refresh=True), so a run less
+# than a day after the last one still sees last night's games; the responses
+# replace the cached ones, and rebuild_db replays them on top of the full log.
+#
+# If anything changed, the graph snapshot is rebuilt so the games pick it up.
+#
+#   python delta_ingest.py
+
+import os
+
+from nba_api.stats.library.parameters import SeasonAll
+from nba_api.stats.static import players, teams
+
+from db_writer import BulkWriter
+from franchises import HISTORICAL_TEAM_ABBRS
+from graph_snapshot import SNAPSHOT_PATH, build_snapshot
+from ingest_engine import IngestEngine
+from migrations import connect, migrate
+from nba_fetch import career_stats, career_team_seasons, game_log, result_frame
+from season_bitmask import current_season_year, season_label
+from stint_index import to_day
+from stint_scraper import detect_stints
+
+DB_PATH = 'nba_players.db'
+REQUESTS_PER_SECOND = 0.5
+CONCURRENCY = 4
+
+
+def load_last_seasons(cursor):
+    cursor.execute("SELECT player_id, MAX(season) FROM player_teams GROUP BY player_id")
+    return dict(cursor.fetchall())
+
+
+def load_last_stints(cursor):
+    # SQLite fills the bare columns from the row holding MAX(stint_number)
+    cursor.execute("""
+        SELECT player_id, MAX(stint_number), team_abbr, end_day
+        FROM player_team_stints GROUP BY player_id
+    """)
+    return {player_id: (stint_number, team_abbr, end_day)
+            for player_id, stint_number, team_abbr, end_day in cursor.fetchall()}
+
+
+def players_to_refresh(all_players, last_seasons, current_year):
+    # New to us, still active, or played last season (may have retired mid-year)
+    recent = season_label(current_year - 1)
+    return [
+        p for p in all_players
+        if p['id'] not in last_seasons or p['is_active'] or last_seasons[p['id']] >= recent
+    ]
+
+
+def merge_stints(last_stint, new_stints):
+    # Split stints detected from a partial game log into (extension of the
+    # stored last stint or None, stints to append). Stints that ended before
+    # the stored data did are already in the db.
+    if last_stint is None:
+        return None, new_stints
+    _, last_team, last_end_day = last_stint
+    fresh = [s for s in new_stints if to_day(s["end_date"]) > last_end_day]
+    if fresh and fresh[0]["team_abbr"] == last_team:
+        return fresh[0], fresh[1:]
+    return None, fresh
+
+
+def refresh_careers(writer, refresh, last_seasons, team_lookup):
+    def fetch(player):
+        return career_stats(player['id'], player['is_active'], refresh=True)
+
+    def parse(player, raw):
+        rows = career_team_seasons(raw, team_lookup)
+        last_season = last_seasons.get(player['id'])
+        if last_season:
+            # Older seasons are already stored; the last one may have grown (trades)
+            rows = [row for row in rows if row[2] >= last_season]
+        return rows
+
+    def write(batch):
+        for player, rows in batch:
+            writer.add_player(player['id'], player['full_name'])
+            for team_abbr, team_full_name, season in rows:
+                writer.add_player_team(player['id'], team_abbr, team_full_name, season)
+
+    engine = IngestEngine(fetch, parse, write, rate=REQUESTS_PER_SECOND, concurrency=CONCURRENCY)
+    return engine.run(refresh)
+
+
+def refresh_stints(writer, refresh, last_stints, current_year):
+    current_season = season_label(current_year)
+
+    def fetch(player):
+        # Players with stored stints only need this season's games
+        season = current_season if player['id'] in last_stints else SeasonAll.all
+        return result_frame(game_log(player['id'], player['is_active'], season=season, refresh=True))
+
+    def parse(player, df):
+        return merge_stints(last_stints.get(player['id']), detect_stints(df))
+
+    def write(batch):
+        for player, (extension, new_stints) in batch:
+            player_id = player['id']
+            last_number = 0
+            if player_id in last_stints:
+                last_number, last_team, _ = last_stints[player_id]
+                if extension:
+                    writer.extend_stint(player_id, last_team, last_number,
+                                        extension["end_date"], extension["end_season"])
+            writer.add_stints(player_id, new_stints, first_number=last_number + 1)
+
+    engine = IngestEngine(fetch, parse, write, rate=REQUESTS_PER_SECOND, concurrency=CONCURRENCY)
+    return engine.run(refresh)
+
+
+def delta_ingest(db_path=DB_PATH):
+    conn = connect(db_path)
+    migrate(conn)
+    cursor = conn.cursor()
+    current_year = current_season_year()
+
+    last_seasons = load_last_seasons(cursor)
+    last_stints = load_last_stints(cursor)
+    refresh = players_to_refresh(players.get_players(), last_seasons, current_year)
+    print(f"🔄 Refreshing {len(refresh)} players for {season_label(current_year)}")
+
+    team_lookup = {t['abbreviation']: t['full_name'] for t in teams.get_teams()}
+    team_lookup.update({abbr: abbr for abbr in HISTORICAL_TEAM_ABBRS if abbr not in team_lookup})
+
+    writer = BulkWriter(conn)
+    changes_before = conn.total_changes
+    career_stats_run = refresh_careers(writer, refresh, last_seasons, team_lookup)
+    stint_run = refresh_stints(writer, refresh, last_stints, current_year)
+    writer.commit()
+    # INSERT OR IGNORE of rows we already had doesn't count as a change
+    changed = conn.total_changes - changes_before
+    conn.close()
+
+    print(f"✅ Career stats: {career_stats_run}")
+    print(f"✅ Game logs: {stint_run}")
+    print(f"📝 {changed} rows added or updated")
+
+    if changed and os.path.exists(SNAPSHOT_PATH):
+        build_snapshot(db_path, SNAPSHOT_PATH)
+        print(f"📦 Rebuilt {SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    delta_ingest()
@@ -1,6 +1,7 @@
 from nba_api.stats.static import players
-from nba_api.stats.endpoints import playercareerstats
-import time
+
+from name_resolver import NameResolver
+from nba_fetch import career_stats, result_rows
 
 # Your list of 50 player names
 player_names = [
@@ -57,27 +58,22 @@ player_names = [
 ]
 
 
-# Step 1: Map names to IDs
-all_players = players.get_players()
-name_to_id = {}
-for name in player_names:
-    matched = [p for p in all_players if p['full_name'].lower() == name.lower()]
-    if matched:
-        name_to_id[name] = matched[0]['id']
-    else:
-        print(f"Player not found: {name}")
+# Step 1: Map names to IDs (accent/punctuation-insensitive, fuzzy fallback)
+resolver = NameResolver.from_nba_api(players.get_players())
+name_to_id, not_found = resolver.resolve_many(player_names)
+for name in not_found:
+    print(f"Player not found: {name}")
 
 # Step 2: Fetch all-time teams for each player
 player_teams = {}
 
 for name, pid in name_to_id.items():
     try:
-        career = playercareerstats.PlayerCareerStats(player_id=pid)
-        time.sleep(0.6)  # be kind to the API
-        stats = career.get_data_frames()[0]
+        col, rows = result_rows(career_stats(pid, delay=0.6))
 
-        if 'TEAM_NAME' in stats.columns and not stats.empty:
-            teams = stats['TEAM_NAME'].dropna().unique().tolist()
+        if 'TEAM_NAME' in col and rows:
+            # Unique team names in order of first appearance
+            teams = list(dict.fromkeys(row[col['TEAM_NAME']] for row in rows if row[col['TEAM_NAME']]))
             player_teams[name] = teams
             print(f"{name}: {teams}")
         else:
@@ -0,0 +1,41 @@
+# franchises.py
+
+# Normalize historical team IDs to franchise IDs
+TEAM_FRANCHISE_MAP = {
+    'NOH': 'NOP',
+    'NOK': 'NOP',
+    'SEA': 'OKC',
+    'VAN': 'MEM',
+    'NJN': 'BKN',
+    'KCK': 'SAC',
+    'CIN': 'SAC',
+    'ROC': 'SAC',
+    'SDC': 'LAC',
+    'SDR': 'HOU',
+    'NOJ': 'UTA',
+    'CHZ': 'WAS',
+    'BAL': 'WAS',
+    'BUF': 'LAC',
+    'STL': 'ATL',
+    'CHA': 'CHA',
+}
+
+# Historical team abbreviations (defunct or relocated teams)
+HISTORICAL_TEAM_ABBRS = {
+    'PHL', 'CIN', 'SEA', 'BUF', 'VAN', 'GOS', 'SYR', 'PIT', 'BOM', 'BAL',
+    'SDR', 'NJN', 'CHH', 'NOJ', 'KCK', 'SAN', 'NOH', 'SFW', 'NOK', 'UTH',
+    'SDC', 'STL', 'NYN', 'PHW', 'FTW', 'DEF', 'BLT', 'CHS', 'INO', 'DN',
+    'CLR', 'MNL', 'TCB', 'PRO', 'MIH', 'CHP', 'CHZ', 'HUS', 'JET', 'AND',
+    'WAT', 'SHE', 'ROC'
+}
+
+# Build franchise map: franchise ID → all its associated historical team IDs (including itself)
+FRANCHISE_MAP = {}
+for hist_id, franchise_id in TEAM_FRANCHISE_MAP.items():
+    FRANCHISE_MAP.setdefault(franchise_id, set()).add(hist_id)
+for fid in TEAM_FRANCHISE_MAP.values():
+    FRANCHISE_MAP.setdefault(fid, set()).add(fid)
+
+
+def normalize_team_id(team_id):
+    return TEAM_FRANCHISE_MAP.get(team_id, team_id)
@@ -1,4 +1,3 @@
-import sqlite3
 import threading
 import time
 from prompt_toolkit import prompt
@@ -7,45 +6,14 @@ from prompt_toolkit.validation import Validator, ValidationError
 from prompt_toolkit.shortcuts import PromptSession
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.formatted_text import HTML
-from collections import defaultdict
 
-DB_PATH = 'nba_players.db'
+from graph_snapshot import load_snapshot
+from migrations import connect, migrate
+from name_resolver import NameResolver
+from player_search import PlayerSearchIndex
+from teammate_graph import TeammateGraph
 
-# Normalize historical team IDs to franchise IDs
-TEAM_FRANCHISE_MAP = {
-    'NOH': 'NOP',
-    'NOK': 'NOP',
-    'SEA': 'OKC',
-    'VAN': 'MEM',
-    'NJN': 'BKN',
-    'KCK': 'SAC',
-    'CIN': 'SAC',
-    'ROC': 'SAC',
-    'SDC': 'LAC',
-    'SDR': 'HOU',
-    'NOJ': 'UTA',
-    'CHZ': 'WAS',
-    'BAL': 'WAS',
-    'BUF': 'LAC',
-    'STL': 'ATL',
-    'CHA': 'CHA',
-}
-
-# Build franchise map: franchise ID → all its associated historical team IDs (including itself)
-FRANCHISE_MAP = {}
-for hist_id, franchise_id in TEAM_FRANCHISE_MAP.items():
-    FRANCHISE_MAP.setdefault(franchise_id, set()).add(hist_id)
-for fid in TEAM_FRANCHISE_MAP.values():
-    FRANCHISE_MAP.setdefault(fid, set()).add(fid)
-
-
-def build_franchise_team_map(team_franchise_map):
-    franchise_map = defaultdict(set)
-    for historical_id, franchise_id in team_franchise_map.items():
-        franchise_map[franchise_id].add(historical_id)
-    for team_id in set(team_franchise_map.values()):
-        franchise_map[team_id].add(team_id)  # add the normalized ID itself
-    return franchise_map
+DB_PATH = 'nba_players.db'
 
 
 # Load all players from DB upfront
@@ -53,60 +21,22 @@ def load_all_players(cursor):
     cursor.execute("SELECT player_id, player_name FROM players")
     return cursor.fetchall()
 
-# Get teammates of a player (any season)
-def normalize_team_id(team_id):
-    return TEAM_FRANCHISE_MAP.get(team_id, team_id)
-
-def get_teammates(cursor, player_id):
-    cursor.execute("SELECT team_id, season FROM player_teams WHERE player_id = ?", (player_id,))
-    rows = cursor.fetchall()
-    teammates = set()
-
-    for team_id, season in rows:
-        franchise_id = TEAM_FRANCHISE_MAP.get(team_id, team_id)
-        team_ids_to_check = FRANCHISE_MAP.get(franchise_id, {franchise_id})
-
-        placeholders = ",".join(["?"] * len(team_ids_to_check))
-        cursor.execute(f"""
-            SELECT player_id FROM player_teams
-            WHERE team_id IN ({placeholders})
-              AND season = ?
-              AND player_id != ?
-        """, (*team_ids_to_check, season, player_id))
-        teammates.update(row[0] for row in cursor.fetchall())
-
-    return teammates
-
-
-
-# Build mapping from player_id to player_name and vice versa
-def build_player_maps(all_players):
-    id_to_name = {}
-    name_to_id = {}
-    for pid, pname in all_players:
-        id_to_name[pid] = pname
-        name_to_id[pname.lower()] = pid
-    return id_to_name, name_to_id
-
-# Autocomplete for player names
+# Autocomplete for player names, best-known players first
 class PlayerCompleter(Completer):
-    def __init__(self, player_names):
-        self.player_names = player_names
+    def __init__(self, search_index):
+        self.search_index = search_index
 
     def get_completions(self, document, complete_event):
-        text = document.text.lower()
-        for name in self.player_names:
-            if text in name.lower():
-                yield Completion(name, start_position=-len(document.text))
+        for _, name in self.search_index.search(document.text):
+            yield Completion(name, start_position=-len(document.text))
 
-# Validate player is in list
+# Validate player is in list (ignoring case, accents and punctuation)
 class PlayerValidator(Validator):
-    def __init__(self, player_names):
-        self.player_names = set(player_names)
+    def __init__(self, resolver):
+        self.resolver = resolver
 
     def validate(self, document):
-        text = document.text.strip()
-        if text not in self.player_names:
+        if self.resolver.resolve(document.text, fuzzy=False) is None:
             raise ValidationError(message="Please select a valid player from the list.")
 
 # Input with timeout and live countdown in bottom toolbar
@@ -147,15 +77,25 @@ def input_with_timeout(prompt_text, completer, validator, timeout=15):
 
 # Main game loop
 def main():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    all_players = load_all_players(cursor)
-    id_to_name, name_to_id = build_player_maps(all_players)
-    all_player_names = list(id_to_name.values())
-
-    completer = PlayerCompleter(all_player_names)
-    validator = PlayerValidator(all_player_names)
+    # Prefer the mmap'd snapshot; fall back to building from SQLite
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        all_players = list(snapshot.players())
+        graph = snapshot.graph
+    else:
+        conn = connect(DB_PATH)
+        migrate(conn)
+        cursor = conn.cursor()
+        all_players = load_all_players(cursor)
+        graph = TeammateGraph.from_cursor(cursor)
+        conn.close()
+    id_to_name = dict(all_players)
+
+    # Rank completions by number of teammates as a popularity proxy
+    popularity = {pid: graph.degree(pid) for pid, _ in all_players}
+    completer = PlayerCompleter(PlayerSearchIndex(all_players, popularity))
+    resolver = NameResolver(all_players)
+    validator = PlayerValidator(resolver)
 
     print("Welcome to the NBA Teammate Guessing Game!")
     print("Rules:")
@@ -185,7 +125,7 @@ def main():
                 print(f"\nTime expired or input interrupted. Player {current_player} loses. Game over.")
                 return
 
-            guess_id = name_to_id.get(guess_name.lower())
+            guess_id = resolver.resolve(guess_name, fuzzy=False)
             if guess_id is None:
                 print(f"{guess_name} is not a valid player. Try again.")
                 continue
@@ -195,8 +135,7 @@ def main():
                 continue
 
             if prev_player_id is not None:
-                teammates = get_teammates(cursor, prev_player_id)
-                if guess_id not in teammates:
+                if not graph.are_teammates(prev_player_id, guess_id):
                     print(f"{guess_name} is NOT a teammate of {id_to_name[prev_player_id]}. Try again.")
                     continue
 
@@ -211,7 +150,5 @@ def main():
             print(f"\nPlayer {current_player} ran out of time. Game over.")
             break
 
-    conn.close()
-
 if __name__ == "__main__":
     main()
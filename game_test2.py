@@ -7,15 +7,23 @@ from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.formatted_text import HTML
 
+from graph_snapshot import load_snapshot
+from name_resolver import NameResolver
+from player_search import PlayerSearchIndex
+from stint_index import load_stint_index
+
 DB_PATH = "nba_players.db"
 
-def get_all_player_names():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT player_id, player_name FROM players")
-    rows = cur.fetchall()
-    conn.close()
-    
+def get_all_player_names(snapshot=None):
+    if snapshot is not None:
+        rows = snapshot.players()
+    else:
+        conn = sqlite3.connect(DB_PATH)
+        cur = conn.cursor()
+        cur.execute("SELECT player_id, player_name FROM players")
+        rows = cur.fetchall()
+        conn.close()
+
     name_map = {}
     for player_id, full_name in rows:
         last_name = full_name.split()[-1].lower()
@@ -27,33 +35,15 @@ def get_all_player_names():
     return name_map
 
 class PlayerNameCompleter(Completer):
-    def __init__(self, name_map):
-        self.name_map = name_map
+    def __init__(self, search_index):
+        self.search_index = search_index
 
     def get_completions(self, document, complete_event):
-        text = document.text.lower()
-        for name, data in self.name_map.items():
-            if text in name.lower() or text in data["last_name"]:
-                yield Completion(name, start_position=-len(document.text))
-
-def were_teammates(player1_id, player2_id):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    query = """
-    SELECT 1
-    FROM player_team_stints p1
-    JOIN player_team_stints p2
-      ON p1.team_abbr = p2.team_abbr
-    WHERE p1.player_id = ?
-      AND p2.player_id = ?
-      AND DATE(p1.start_date) <= DATE(p2.end_date)
-      AND DATE(p1.end_date) >= DATE(p2.start_date)
-    LIMIT 1;
-    """
-    cur.execute(query, (player1_id, player2_id))
-    result = cur.fetchone()
-    conn.close()
-    return result is not None
+        for _, name in self.search_index.search(document.text):
+            yield Completion(name, start_position=-len(document.text))
+
+def were_teammates(stints, player1_id, player2_id):
+    return stints.were_teammates(player1_id, player2_id)
 
 def timed_turn_input(prompt_text, completer, timeout=15):
     session = PromptSession(completer=completer)
@@ -99,8 +89,17 @@ def play_game():
     last_player_name = None
     turn = 1
 
-    name_map = get_all_player_names()
-    name_completer = PlayerNameCompleter(name_map)
+    # Prefer the mmap'd snapshot; fall back to building from SQLite
+    snapshot = load_snapshot()
+    name_map = get_all_player_names(snapshot)
+    stints = snapshot.stints if snapshot is not None else load_stint_index(DB_PATH)
+    # Rank completions by time spent on NBA rosters
+    search_index = PlayerSearchIndex(
+        ((data["id"], name) for name, data in name_map.items()),
+        {data["id"]: stints.days_played(data["id"]) for data in name_map.values()},
+    )
+    name_completer = PlayerNameCompleter(search_index)
+    resolver = NameResolver((data["id"], name) for name, data in name_map.items())
 
     print("🏀 NBA Teammate Game")
     print("Take turns naming players who were teammates. You have 15 seconds per turn.\n")
@@ -117,19 +116,18 @@ def play_game():
                 print(f"❌ {current_player} ran out of time. Game over.")
                 return
 
-            result = name_map.get(name_input.strip())
-            if not result:
+            player_id = resolver.resolve(name_input, fuzzy=False)
+            if player_id is None:
                 print("❌ Invalid player. Try again.")
                 continue
 
-            player_id = result["id"]
-            player_name = result["full_name"]
+            player_name = resolver.name_of(player_id)
 
             if player_id in used_ids:
                 print(f"❌ {player_name} has already been used.")
                 continue
 
-            if prev_player_id and not were_teammates(prev_player_id, player_id):
+            if prev_player_id and not were_teammates(stints, prev_player_id, player_id):
                 print(f"❌ {player_name} was not a teammate of the previous player.")
                 continue
 
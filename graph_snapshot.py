@@ -0,0 +1,275 @@
+# graph_snapshot.py
+#
+# Versioned, checksummed binary snapshot of players, names, stints and the
+# teammate graph. Readers mmap the file and wrap each section in a memoryview,
+# so startup does no parsing and every worker process shares the same pages.
+#
+# Layout (little-endian header, native-endian int32 sections):
+#   header   MAGIC, version, byteorder, section count, payload crc32, source
+#   table    one (name, offset, length) entry per section
+#   payload  8-byte aligned sections
+#
+# source is a digest of the database state the snapshot was built from (see
+# source_identity). load_snapshot() compares it with the database and returns
+# None for a stale snapshot, so callers fall back to SQLite until it is rebuilt.
+#
+#   python graph_snapshot.py [db_path] [snapshot_path]
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+
+from migrations import connect, migrate
+from stint_index import StintIndex
+from teammate_graph import TeammateGraph
+
+DB_PATH = 'nba_players.db'
+SNAPSHOT_PATH = 'nba_graph.snapshot'
+
+MAGIC = b'NBAGRAPH'
+VERSION = 2
+HEADER = struct.Struct('<8sIBxxxII32s')
+SECTION = struct.Struct('<16sQQ')
+ALIGN = 8
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _StringTable:
+    # Lazily decoded strings stored as (offsets, utf-8 blob)
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _GroupKeys:
+    # group g -> (franchise_id, season)
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, g):
+        franchise_id, season = self.table[g].split('\t')
+        return franchise_id, season
+
+
+def source_identity(conn):
+    # Changes whenever the snapshot's tables do: sync_changes logs every
+    # players / stints write and player_teams is insert-only, so their
+    # AUTOINCREMENT counters (which survive pruning) move on every change.
+    # An ignored duplicate insert moves them too, which only costs a rebuild.
+    # sqlite_sequence has a row per AUTOINCREMENT table, so startup doesn't
+    # grow with the history.
+    # None for a database older than the change log.
+    try:
+        source, = conn.execute("SELECT id FROM sync_source").fetchone()
+        counters = dict(conn.execute(
+            "SELECT name, seq FROM sqlite_sequence WHERE name IN ('sync_changes', 'player_teams')"
+        ).fetchall())
+    except sqlite3.OperationalError:
+        return None
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    state = f"{source}:{version}:{counters.get('sync_changes', 0)}:{counters.get('player_teams', 0)}"
+    return hashlib.sha256(state.encode()).digest()
+
+
+def _string_table(strings):
+    offsets = array('i', [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def _sections(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT player_id, player_name FROM players ORDER BY player_id")
+    players = cur.fetchall()
+    graph = TeammateGraph.from_cursor(cur)
+    stints = StintIndex.from_connection(conn)
+
+    name_offsets, name_blob = _string_table(name for _, name in players)
+    name_order = sorted(range(len(players)), key=lambda i: players[i][1].lower())
+    key_offsets, key_blob = _string_table(f"{f}\t{s}" for f, s in graph.group_keys)
+    team_offsets, team_blob = _string_table(stints.teams)
+
+    return [
+        ('players', array('i', (pid for pid, _ in players))),
+        ('name_offsets', name_offsets),
+        ('names', name_blob),
+        ('name_order', array('i', name_order)),
+        ('g_player_ids', graph.player_ids),
+        ('g_offsets', graph.offsets),
+        ('g_neighbors', graph.neighbors),
+        ('g_group_offs', graph.group_offsets),
+        ('g_groups', graph.groups),
+        ('g_key_offsets', key_offsets),
+        ('g_keys', key_blob),
+        ('s_team_offs', team_offsets),
+        ('s_teams', team_blob),
+        ('s_team_ranges', stints.team_offsets),
+        ('s_starts', stints.starts),
+        ('s_ends', stints.ends),
+        ('s_players', stints.stint_players),
+        ('s_stint_teams', stints.stint_teams),
+        ('s_max_end', stints.max_end),
+        ('s_player_ids', stints.player_ids),
+        ('s_player_offs', stints.player_offsets),
+        ('s_player_stints', stints.player_stints),
+    ]
+
+
+def write_snapshot(sections, path=SNAPSHOT_PATH, source=b''):
+    table_size = HEADER.size + SECTION.size * len(sections)
+    offset = table_size + (-table_size % ALIGN)
+    entries = []
+    payload = bytearray()
+    for name, data in sections:
+        raw = data.tobytes() if isinstance(data, array) else bytes(data)
+        payload += b'\0' * (-len(payload) % ALIGN)
+        entries.append((name.encode('ascii'), offset + len(payload), len(raw)))
+        payload += raw
+
+    header = HEADER.pack(MAGIC, VERSION, sys.byteorder == 'little', len(sections), zlib.crc32(payload), source)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for entry in entries:
+            f.write(SECTION.pack(*entry))
+        f.write(b'\0' * (offset - table_size))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def build_snapshot(db_path=DB_PATH, path=SNAPSHOT_PATH):
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        # One read transaction, so the identity matches the rows read
+        conn.execute("BEGIN")
+        source = source_identity(conn)
+        write_snapshot(_sections(conn), path, source)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+class Snapshot:
+    def __init__(self, path=SNAPSHOT_PATH, verify=False):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+
+        magic, version, little, count, crc, self.source = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a teammate graph snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{path} is snapshot version {version}, expected {VERSION}")
+        if bool(little) != (sys.byteorder == 'little'):
+            raise SnapshotError(f"{path} was built on a machine with a different byte order")
+
+        sections = {}
+        payload_start = None
+        for k in range(count):
+            name, offset, length = SECTION.unpack_from(buf, HEADER.size + k * SECTION.size)
+            sections[name.rstrip(b'\0').decode('ascii')] = buf[offset:offset + length]
+            payload_start = offset if payload_start is None else min(payload_start, offset)
+        if verify and zlib.crc32(buf[payload_start or len(buf):]) != crc:
+            raise SnapshotError(f"{path} failed its checksum")
+
+        ints = {name: view.cast('i') for name, view in sections.items()
+                if name not in ('names', 'g_keys', 's_teams')}
+
+        self.player_ids = ints['players']
+        self.names = _StringTable(ints['name_offsets'], sections['names'])
+        self.name_order = ints['name_order']
+        self.graph = TeammateGraph(
+            ints['g_player_ids'], ints['g_offsets'], ints['g_neighbors'],
+            ints['g_group_offs'], ints['g_groups'],
+            _GroupKeys(_StringTable(ints['g_key_offsets'], sections['g_keys'])),
+        )
+        self.stints = StintIndex(
+            _StringTable(ints['s_team_offs'], sections['s_teams']), ints['s_team_ranges'],
+            ints['s_starts'], ints['s_ends'], ints['s_players'], ints['s_stint_teams'], ints['s_max_end'],
+            ints['s_player_ids'], ints['s_player_offs'], ints['s_player_stints'],
+        )
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def players(self):
+        return zip(self.player_ids, self.names)
+
+    def player_name(self, player_id):
+        i = bisect_left(self.player_ids, player_id)
+        if i < len(self.player_ids) and self.player_ids[i] == player_id:
+            return self.names[i]
+        return None
+
+    def find_player(self, name):
+        # Case-insensitive exact match via the name_order section
+        target = name.strip().lower()
+        i = bisect_left(self.name_order, target, key=lambda j: self.names[j].lower())
+        if i < len(self.name_order):
+            j = self.name_order[i]
+            if self.names[j].lower() == target:
+                return self.player_ids[j]
+        return None
+
+
+def is_current(snapshot, db_path=DB_PATH):
+    # A snapshot without its database next to it (a snapshot-only deploy) is trusted
+    if not os.path.exists(db_path):
+        return True
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return source_identity(conn) == snapshot.source
+    finally:
+        conn.close()
+
+
+def load_snapshot(path=SNAPSHOT_PATH, verify=False, db_path=DB_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = Snapshot(path, verify)
+    except SnapshotError as e:
+        print(f"⚠️ Ignoring snapshot: {e}; rebuild with python graph_snapshot.py")
+        return None
+    if not is_current(snapshot, db_path):
+        print(f"⚠️ {path} does not match {db_path}; rebuild with python graph_snapshot.py")
+        return None
+    return snapshot
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    snapshot_path = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_PATH
+    build_snapshot(db_path, snapshot_path)
+    snapshot = load_snapshot(snapshot_path, verify=True, db_path=db_path)
+    print(f"✅ Wrote {snapshot_path}: {len(snapshot)} players, "
+          f"{len(snapshot.graph.neighbors) // 2} teammate pairs, {len(snapshot.stints.starts)} stints")
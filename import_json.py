@@ -1,41 +1,47 @@
-import json
-import time
 from collections import defaultdict
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import playercareerstats
+from nba_api.stats.static import players, teams
+
+from franchises import HISTORICAL_TEAM_ABBRS
+from nba_fetch import career_stats, career_team_seasons
+from team_history import HISTORY_PATH, HistoryWriter
 
 # Step 1: Get all players
 all_players = players.get_players()
 print(f"Total players found: {len(all_players)}")
 
-# Step 2: Prepare the output data
-player_team_history = []
+# Career rows only carry TEAM_ABBREVIATION; resolve it to the team's name
+team_lookup = {abbr: abbr for abbr in HISTORICAL_TEAM_ABBRS}
+team_lookup.update({t['abbreviation']: t['full_name'] for t in teams.get_teams()})
+
+# Step 2: Stream each player to the JSON Lines file as soon as it's processed;
+# players already in the file (from a run that died partway) are skipped
+history = HistoryWriter(HISTORY_PATH)
+print(f"Already written: {len(history.done)}")
 
 for player in all_players:
     player_id = player['id']
     full_name = player['full_name']
+    if player_id in history.done:
+        continue
     try:
-        career = playercareerstats.PlayerCareerStats(player_id=player_id)
-        time.sleep(0.6)  # To avoid hitting rate limits
-        df = career.get_data_frames()[0]
+        # Cached; only a miss hits the API (and sleeps to avoid rate limits)
+        career = career_stats(player_id, player['is_active'], delay=0.6)
 
         team_years = defaultdict(list)
-        for _, row in df.iterrows():
-            team_name = row.get('TEAM_NAME')
-            season = row.get('SEASON_ID')
-            if team_name and season:
-                start_year = int(season.split('-')[0])
-                team_years[team_name].append(start_year)
+        for _, team_name, season in career_team_seasons(career, team_lookup):
+            start_year = int(season.split('-')[0])
+            team_years[team_name].append(start_year)
 
         # Convert to list of dicts
-        teams = [
+        team_entries = [
             {"team_name": team, "years": sorted(set(years))}
             for team, years in team_years.items()
         ]
 
-        player_team_history.append({
+        history.write({
+            "player_id": player_id,
             "player_name": full_name,
-            "teams": teams
+            "teams": team_entries
         })
 
         print(f"Processed: {full_name}")
@@ -43,8 +49,5 @@ for player in all_players:
     except Exception as e:
         print(f"Error processing {full_name}: {e}")
 
-# Step 3: Write to JSON
-with open('player_team_history.json', 'w') as f:
-    json.dump(player_team_history, f, indent=2)
-
-print("All player data written to player_team_history.json")
+history.close()
+print(f"All player data written to {HISTORY_PATH}")
@@ -0,0 +1,320 @@
+# ingest_engine.py
+#
+# Concurrent ingestion pipeline shared by the scrapers:
+#
+#   tasks -> [fetch workers x concurrency] -> parse -> [single writer]
+#
+# Every fetch first takes a token from one global RateController, so total
+# request rate stays under the upstream limit no matter how many fetches are in
+# flight. The controller is AIMD: each healthy response nudges the rate up by
+# RATE_STEP, while a throttle signal (a 429/503 status, Retry-After, or a
+# timeout) or rising latency halves it. Other failures (a 404, a bad payload)
+# are retried without touching the rate. A Retry-After header pauses every
+# worker until it passes.
+# Retries just wait for their next token, so there are no fixed backoff sleeps.
+# Stages are connected by bounded asyncio queues, so a slow writer applies
+# backpressure instead of buffering the whole run in memory. An exception
+# from write() or on_failure cancels the other stages and ends the run.
+#
+# fetch(task) may be a coroutine function or a blocking callable (nba_api
+# endpoints are blocking and run in a worker thread). An optional
+# lookup(task) returns a cached response or None; hits skip the rate limiter
+# (and don't count as healthy responses), so a cached re-run isn't throttled. parse(task, raw) returns
+# rows, and write(batch) receives a list of (task, rows) from a single coroutine.
+
+import asyncio
+import email.utils
+import inspect
+import json
+import time
+import urllib.request
+
+try:
+    from requests import Timeout as RequestsTimeout
+except ImportError:  # only the nba_api fetchers go through requests
+    RequestsTimeout = TimeoutError
+
+DEFAULT_RATE = 0.5  # requests per second; the old scrapers slept 2s per request
+DEFAULT_BURST = 1
+DEFAULT_CONCURRENCY = 4
+QUEUE_SIZE = 64
+WRITE_BATCH = 50
+FLUSH_INTERVAL = 5  # seconds before a partial write batch is flushed
+MAX_RETRIES = 5
+MIN_RATE = 0.02  # one request every 50s at worst
+MAX_RATE = 2.0
+RATE_STEP = 0.01  # added per healthy response
+BACKOFF = 0.5  # rate multiplier on a throttle signal
+THROTTLE_STATUSES = {429, 503}
+LATENCY_ALPHA = 0.2  # EWMA weight of the newest response time
+LATENCY_FACTOR = 2  # EWMA this many times the best seen counts as congestion
+LATENCY_FLOOR = 0.5  # seconds; cache hits are too fast to set a baseline
+
+_DONE = object()
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = None
+        self._lock_loop = None
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _get_lock(self):
+        # One lock per event loop, so a bucket can be reused across asyncio.run() calls
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self):
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after(error):
+    # Seconds from a Retry-After header on urllib's HTTPError or a requests HTTPError
+    headers = getattr(error, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def http_status(error):
+    # Status code of urllib's HTTPError (.code) or a requests HTTPError (.response)
+    status = getattr(error, 'code', None)
+    if isinstance(status, int):
+        return status
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def is_throttle(error):
+    if http_status(error) in THROTTLE_STATUSES or retry_after(error) is not None:
+        return True
+    # urllib wraps socket timeouts in URLError.reason
+    return isinstance(error, (TimeoutError, RequestsTimeout)) or isinstance(
+        getattr(error, 'reason', None), TimeoutError)
+
+
+class RateController(TokenBucket):
+    def __init__(self, rate, capacity=DEFAULT_BURST, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 clock=time.monotonic):
+        super().__init__(rate, capacity, clock)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.paused_until = 0
+        self.last_cut = float('-inf')
+        self.latency = None  # EWMA of response time
+        self.best_latency = None
+        self.cuts = 0
+
+    async def acquire(self):
+        # Returns the request's start time, to hand back to on_success/on_error
+        while (wait := self.paused_until - self.clock()) > 0:
+            await asyncio.sleep(wait)
+        await super().acquire()
+        return self.clock()
+
+    def on_success(self, started):
+        latency = self.clock() - started
+        self.best_latency = latency if self.best_latency is None else min(self.best_latency, latency)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+
+        if self.latency > LATENCY_FACTOR * max(self.best_latency, LATENCY_FLOOR):
+            self._cut(started)
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+    def on_error(self, started, error):
+        wait = retry_after(error)
+        if wait:
+            self.paused_until = max(self.paused_until, self.clock() + wait)
+        if is_throttle(error):
+            self._cut(started)
+
+    def _cut(self, started):
+        # Requests already in flight when we cut report the same congestion; cut once
+        if started < self.last_cut:
+            return
+        self.rate = max(self.min_rate, self.rate * BACKOFF)
+        self.last_cut = self.clock()
+        self.latency = None
+        self.cuts += 1
+
+
+def json_http_fetcher(url_template, timeout=30):
+    # Plain HTTP JSON fetch, e.g. against a local fake server:
+    #   json_http_fetcher("http://127.0.0.1:8000/career/{id}")
+    def fetch(task):
+        with urllib.request.urlopen(url_template.format(**task), timeout=timeout) as response:
+            return json.load(response)
+    return fetch
+
+
+class IngestEngine:
+    def __init__(self, fetch, parse, write, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 concurrency=DEFAULT_CONCURRENCY, queue_size=QUEUE_SIZE, write_batch=WRITE_BATCH,
+                 max_retries=MAX_RETRIES, on_failure=None, max_rate=MAX_RATE, controller=None,
+                 lookup=None):
+        self.fetch = fetch
+        self.lookup = lookup
+        self.parse = parse
+        self.write = write
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.write_batch = write_batch
+        self.max_retries = max_retries
+        self.on_failure = on_failure
+        self.max_rate = max_rate
+        # Pass one controller to several engines to keep the learned rate between runs
+        self.controller = controller
+        self.stats = {}
+
+    async def _call_fetch(self, task):
+        if inspect.iscoroutinefunction(self.fetch):
+            return await self.fetch(task)
+        return await asyncio.to_thread(self.fetch, task)
+
+    async def _fetch_with_retries(self, controller, task):
+        for attempt in range(1, self.max_retries + 1):
+            started = await controller.acquire()
+            self.stats["requests"] += 1
+            try:
+                raw = await self._call_fetch(task)
+            except Exception as e:
+                controller.on_error(started, e)
+                if attempt == self.max_retries:
+                    self.stats["failed"] += 1
+                    print(f"❌ Failed {task} after {self.max_retries} attempts: {e}")
+                    if self.on_failure:
+                        self.on_failure(task, e)
+                    return None
+                print(f"⚠️ Error fetching {task} (Attempt {attempt}): {e}; "
+                      f"retrying at {controller.rate:.2f} req/s")
+                continue
+            controller.on_success(started)
+            return raw
+
+    async def _produce(self, tasks, task_queue):
+        for task in tasks:
+            await task_queue.put(task)
+        for _ in range(self.concurrency):
+            await task_queue.put(_DONE)
+
+    async def _fetch_worker(self, controller, task_queue, raw_queue):
+        while True:
+            task = await task_queue.get()
+            if task is _DONE:
+                return
+            raw = None
+            if self.lookup:
+                raw = await asyncio.to_thread(self.lookup, task)
+                if raw is not None:
+                    self.stats["cached"] += 1
+            if raw is None:
+                raw = await self._fetch_with_retries(controller, task)
+            if raw is not None:
+                self.stats["fetched"] += 1
+                await raw_queue.put((task, raw))
+
+    async def _fetch_stage(self, controller, task_queue, raw_queue):
+        await asyncio.gather(*(self._fetch_worker(controller, task_queue, raw_queue)
+                               for _ in range(self.concurrency)))
+        await raw_queue.put(_DONE)
+
+    async def _parse_worker(self, raw_queue, row_queue):
+        while True:
+            item = await raw_queue.get()
+            if item is _DONE:
+                await row_queue.put(_DONE)
+                return
+            task, raw = item
+            try:
+                rows = self.parse(task, raw)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"❌ Failed to parse {task}: {e}")
+                if self.on_failure:
+                    self.on_failure(task, e)
+                continue
+            await row_queue.put((task, rows))
+
+    async def _write_worker(self, row_queue):
+        batch = []
+        batch_started = None
+        while True:
+            item = await row_queue.get()
+            done = item is _DONE
+            if not done:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(item)
+            full = len(batch) >= self.write_batch
+            stale = batch and time.monotonic() - batch_started >= FLUSH_INTERVAL
+            if batch and (done or full or stale):
+                self.write(batch)
+                self.stats["written"] += len(batch)
+                batch = []
+            if done:
+                return
+
+    async def run_async(self, tasks):
+        self.stats = {"requests": 0, "cached": 0, "fetched": 0, "failed": 0, "written": 0}
+        started = time.monotonic()
+        controller = self.controller or RateController(self.rate, self.burst, max_rate=self.max_rate)
+        task_queue = asyncio.Queue(self.queue_size)
+        raw_queue = asyncio.Queue(self.queue_size)
+        row_queue = asyncio.Queue(self.queue_size)
+
+        stages = [
+            asyncio.create_task(self._produce(tasks, task_queue)),
+            asyncio.create_task(self._fetch_stage(controller, task_queue, raw_queue)),
+            asyncio.create_task(self._parse_worker(raw_queue, row_queue)),
+            asyncio.create_task(self._write_worker(row_queue)),
+        ]
+        # A stage that raises (write, on_failure) would leave the others blocked
+        # on full queues forever; stop them and re-raise instead
+        done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+        for stage in pending:
+            stage.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for stage in stages:
+            if stage in done and stage.exception() is not None:
+                raise stage.exception()
+
+        self.stats["elapsed"] = time.monotonic() - started
+        self.stats["rate"] = round(controller.rate, 3)
+        self.stats["rate_cuts"] = controller.cuts
+        return self.stats
+
+    def run(self, tasks):
+        return asyncio.run(self.run_async(tasks))
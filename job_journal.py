@@ -0,0 +1,71 @@
+# job_journal.py
+#
+# Per-player task state for ingestion runs, kept in nba_players.db itself:
+#
+#   pending -> in_flight -> done
+#                       \-> failed
+#
+# "done" is written through the run's BulkWriter, so it commits in the same
+# transaction as the player's rows: after a crash a player is either done with
+# all its rows, or not done and claimed again. Runs claim their work with one
+# indexed query instead of re-deriving it from the data tables. Failures also
+# go to the DeadLetterQueue, and a later success clears them from it. The
+# ingest_jobs table is created by migrations.py.
+
+import time
+
+from dead_letters import DeadLetterQueue
+
+JOB_STATES = ('pending', 'in_flight', 'done', 'failed')
+
+MARK_SQL = """
+    UPDATE ingest_jobs SET state = ?, last_error = ?, updated_at = ?
+    WHERE job = ? AND player_id = ?
+"""
+
+
+class JobJournal:
+    def __init__(self, conn):
+        # conn comes from migrations.connect() + migrate(), which own the tables
+        self.conn = conn
+        self.dead_letters = DeadLetterQueue(conn)
+
+    def enqueue(self, job, player_ids, done_ids=()):
+        # New players start pending; ones already tracked keep their state.
+        # done_ids seeds players an older resume signal already counted as finished.
+        now = time.time()
+        done_ids = set(done_ids)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO ingest_jobs (job, player_id, state, updated_at) VALUES (?, ?, ?, ?)",
+            ((job, pid, 'done' if pid in done_ids else 'pending', now) for pid in player_ids)
+        )
+        self.conn.commit()
+
+    def claim(self, job):
+        # Pending work plus whatever a crashed run left in flight
+        rows = self.conn.execute(
+            "SELECT player_id FROM ingest_jobs WHERE job = ? AND state IN ('pending', 'in_flight') "
+            "ORDER BY player_id",
+            (job,)
+        ).fetchall()
+        self.conn.execute(
+            "UPDATE ingest_jobs SET state = 'in_flight', attempts = attempts + 1, updated_at = ? "
+            "WHERE job = ? AND state IN ('pending', 'in_flight')",
+            (time.time(), job)
+        )
+        self.conn.commit()
+        return [row[0] for row in rows]
+
+    def done(self, writer, job, player_id):
+        writer.add(MARK_SQL, ('done', None, time.time(), job, player_id))
+        self.dead_letters.resolve(writer, job, player_id)
+
+    def fail(self, writer, job, player_id, error):
+        writer.add(MARK_SQL, ('failed', str(error)[:500], time.time(), job, player_id))
+        self.dead_letters.add(writer, job, player_id, error)
+
+    def counts(self, job):
+        rows = self.conn.execute(
+            "SELECT state, COUNT(*) FROM ingest_jobs WHERE job = ? GROUP BY state", (job,)
+        ).fetchall()
+        return {state: dict(rows).get(state, 0) for state in JOB_STATES}
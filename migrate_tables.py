@@ -1,102 +1,263 @@
+# migrate_tables.py
+#
+# Copy nba_players.db into the Supabase Postgres database index.js serves from.
+#
+# Each table is streamed out of SQLite in primary-key order, CHUNK_ROWS at a
+# time. A chunk is COPYed into a temp staging table and merged into the real
+# table with one INSERT ... ON CONFLICT; Postgres rows in the chunk's key range
+# that SQLite no longer has are deleted (an anti-join against the stage), so a
+# finished pass leaves an exact mirror. The chunk's checkpoint (the last key
+# copied) commits in the same transaction, so a failed or interrupted run
+# resumes after its last committed chunk instead of starting over. Tables load
+# concurrently, each on its own pair of connections.
+#
+# The connection string is SUPABASE_DB_URL, from the environment or .env
+# (the same setting index.js reads). .env is untracked; start from .env.example.
+#
+#   python migrate_tables.py            # resume where the last run stopped
+#   python migrate_tables.py --restart  # ignore checkpoints, copy everything
+
+import argparse
+import csv
+import io
+import json
+import os
 import sqlite3
-import psycopg2
-import urllib.parse
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from migrations import ORDINAL_EPOCH
 
 # === CONFIGURATION ===
 
-# SQLite DB path
 SQLITE_DB_PATH = "nba_players.db"
+ENV_PATH = ".env"
+CHUNK_ROWS = 20000
 
-# Raw Supabase password (human-readable)
-RAW_PASSWORD = "s3$ycj#eQ?u_V4L"
+# (table, key columns, {Postgres column: SQLite expression}); keys come first
+TABLES = [
+    ("players", ("player_id",), {
+        "player_id": "player_id",
+        "player_name": "player_name",
+    }),
+    # SQLite keeps day numbers (date.toordinal()); Postgres gets ISO dates
+    ("player_team_stints", ("player_id", "team_abbr", "stint_number"), {
+        "player_id": "player_id",
+        "team_abbr": "team_abbr",
+        "stint_number": "stint_number",
+        "start_season": "start_season",
+        "end_season": "end_season",
+        "start_date": f"date(start_day + {ORDINAL_EPOCH})",
+        "end_date": f"date(end_day + {ORDINAL_EPOCH})",
+    }),
+]
 
-# Encode password for URL safety
-ENCODED_PASSWORD = urllib.parse.quote_plus(RAW_PASSWORD)
+CHECKPOINTS_SQL = """
+    CREATE TABLE IF NOT EXISTS migration_checkpoints (
+        table_name TEXT PRIMARY KEY,
+        last_key TEXT NOT NULL,
+        rows_copied BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+SAVE_CHECKPOINT_SQL = """
+    INSERT INTO migration_checkpoints (table_name, last_key, rows_copied)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (table_name) DO UPDATE SET
+        last_key = EXCLUDED.last_key,
+        rows_copied = EXCLUDED.rows_copied,
+        updated_at = now()
+"""
+
+
+def load_env(path=ENV_PATH):
+    # Minimal .env reader; variables already in the environment win
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            os.environ.setdefault(key.strip(), value.strip().strip('"\''))
 
-# Supabase session pooler connection string
-POSTGRES_CONN_INFO = (
-    f"postgresql://postgres.rbjdlzgptvpfsnkakasj:{ENCODED_PASSWORD}"
-    f"@aws-0-us-east-1.pooler.supabase.com:5432/postgres"
-)
+
+def postgres_url():
+    load_env()
+    return os.environ.get("SUPABASE_DB_URL")
 
 
 # === MIGRATION FUNCTIONS ===
 
-def migrate_players(sqlite_conn, pg_conn):
-    sqlite_cur = sqlite_conn.cursor()
-    pg_cur = pg_conn.cursor()
-
-    sqlite_cur.execute("SELECT player_id, player_name FROM players")
-    players = sqlite_cur.fetchall()
-
-    for player_id, player_name in players:
-        pg_cur.execute(
-            """
-            INSERT INTO players (player_id, player_name)
-            VALUES (%s, %s)
-            ON CONFLICT (player_id) DO NOTHING
-            """,
-            (player_id, player_name),
-        )
-    pg_conn.commit()
-    print(f"✅ Inserted {len(players)} players.")
+def read_chunk(sqlite_cur, table, keys, columns, last_key, chunk_rows):
+    sql = f"SELECT {', '.join(columns.values())} FROM {table}"
+    params = []
+    if last_key is not None:
+        # Keyset pagination: walks the primary key index, no OFFSET rescans
+        sql += f" WHERE ({', '.join(keys)}) > ({', '.join('?' * len(keys))})"
+        params += last_key
+    sql += f" ORDER BY {', '.join(keys)} LIMIT ?"
+    sqlite_cur.execute(sql, params + [chunk_rows])
+    return sqlite_cur.fetchall()
 
 
-def migrate_stints(sqlite_conn, pg_conn):
-    sqlite_cur = sqlite_conn.cursor()
-    pg_cur = pg_conn.cursor()
+def create_stage(pg_cur, table, columns):
+    # Emptied by every commit, so each transaction starts with a clean stage
+    stage = f"stage_{table}"
+    pg_cur.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DELETE ROWS AS "
+        f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+    )
+    return stage
+
+
+def copy_rows(pg_cur, stage, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    pg_cur.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def merge_sql(table, stage, keys, columns):
+    names = ', '.join(columns)
+    values = [c for c in columns if c not in keys]
+    return f"""
+        INSERT INTO {table} ({names})
+        SELECT {names} FROM {stage}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in values)}
+        WHERE ({', '.join(f'{table}.{c}' for c in values)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in values)})
+    """
 
-    sqlite_cur.execute(
-        """
-        SELECT player_id, team_abbr, stint_number, start_season, end_season, start_date, end_date
-        FROM player_team_stints
-        """
+
+def _key_exprs(keys, sample_key, alias=''):
+    # SQLite orders text keys bytewise; compare them the same way in Postgres
+    return ', '.join(f'{alias}{k} COLLATE "C"' if isinstance(v, str) else f'{alias}{k}'
+                     for k, v in zip(keys, sample_key))
+
+
+def delete_missing(pg_cur, table, stage, keys, after, through):
+    # Delete target rows with after < key <= through that aren't staged; either
+    # bound may be None (open). Returns the number of rows deleted.
+    sample = through or after
+    conditions, params = [], []
+    if after is not None:
+        conditions.append(f"({_key_exprs(keys, sample, 't.')}) > ({', '.join(['%s'] * len(keys))})")
+        params += after
+    if through is not None:
+        conditions.append(f"({_key_exprs(keys, sample, 't.')}) <= ({', '.join(['%s'] * len(keys))})")
+        params += through
+    conditions.append(
+        f"NOT EXISTS (SELECT 1 FROM {stage} s WHERE {' AND '.join(f's.{k} = t.{k}' for k in keys)})"
     )
-    stints = sqlite_cur.fetchall()
-
-    for stint in stints:
-        pg_cur.execute(
-            """
-            INSERT INTO player_team_stints (
-                player_id, team_abbr, stint_number, start_season, end_season, start_date, end_date
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (player_id, team_abbr, stint_number) DO NOTHING
-            """,
-            stint,
-        )
+    pg_cur.execute(f"DELETE FROM {table} t WHERE {' AND '.join(conditions)}", params)
+    return pg_cur.rowcount
+
+
+def migrate_table(spec, sqlite_path, pg_url, restart=False, chunk_rows=CHUNK_ROWS, max_chunks=None):
+    # Returns (rows copied, finished); stops early after max_chunks chunks
+    table, keys, columns = spec
+    sqlite_conn = sqlite3.connect(sqlite_path)
+    pg_conn = psycopg2.connect(pg_url)
+    try:
+        sqlite_cur = sqlite_conn.cursor()
+        pg_cur = pg_conn.cursor()
+        stage = create_stage(pg_cur, table, columns)
+        if restart:
+            pg_cur.execute("DELETE FROM migration_checkpoints WHERE table_name = %s", (table,))
+        pg_cur.execute("SELECT last_key, rows_copied FROM migration_checkpoints WHERE table_name = %s", (table,))
+        checkpoint = pg_cur.fetchone()
+        pg_conn.commit()
+
+        last_key, copied = (json.loads(checkpoint[0]), checkpoint[1]) if checkpoint else (None, 0)
+        if checkpoint:
+            print(f"⏭️ {table}: resuming after {copied} rows")
+
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            rows = read_chunk(sqlite_cur, table, keys, columns, last_key, chunk_rows)
+            if not rows:
+                # Finished: drop whatever sorts after SQLite's last key, and
+                # the next run is a fresh full pass
+                deleted = delete_missing(pg_cur, table, stage, keys, last_key, None)
+                pg_cur.execute("DELETE FROM migration_checkpoints WHERE table_name = %s", (table,))
+                pg_conn.commit()
+                if deleted:
+                    print(f"🗑️ {table}: deleted {deleted} rows past the last key")
+                return copied, True
+            try:
+                chunk_key = list(rows[-1][:len(keys)])
+                copy_rows(pg_cur, stage, columns, rows)
+                deleted = delete_missing(pg_cur, table, stage, keys, last_key, chunk_key)
+                pg_cur.execute(merge_sql(table, stage, keys, columns))
+                pg_cur.execute(SAVE_CHECKPOINT_SQL, (table, json.dumps(chunk_key), copied + len(rows)))
+                pg_conn.commit()
+            except Exception:
+                pg_conn.rollback()
+                raise
+            last_key = chunk_key
+            copied += len(rows)
+            chunks += 1
+            print(f"📦 {table}: {copied} rows" + (f", deleted {deleted}" if deleted else ""))
+        return copied, False
+    finally:
+        sqlite_conn.close()
+        pg_conn.close()
+
+
+def migrate(sqlite_path, pg_url, restart=False, chunk_rows=CHUNK_ROWS, max_chunks=None):
+    # One thread per table; returns {table: (rows copied, finished) or the exception}
+    pg_conn = psycopg2.connect(pg_url)
+    # Up front: concurrent CREATE TABLE IF NOT EXISTS can still collide
+    pg_conn.cursor().execute(CHECKPOINTS_SQL)
     pg_conn.commit()
-    print(f"✅ Inserted {len(stints)} player_team_stints.")
+    pg_conn.close()
+
+    with ThreadPoolExecutor(max_workers=len(TABLES)) as pool:
+        futures = {
+            spec[0]: pool.submit(migrate_table, spec, sqlite_path, pg_url, restart, chunk_rows, max_chunks)
+            for spec in TABLES
+        }
+    results = {}
+    for table, future in futures.items():
+        try:
+            results[table] = future.result()
+        except Exception as e:
+            results[table] = e
+    return results
 
 
 # === MAIN EXECUTION ===
 
 def main():
-    try:
-        sqlite_conn = sqlite3.connect(SQLITE_DB_PATH)
-        print("✅ Connected to SQLite.")
-    except Exception as e:
-        print(f"❌ Failed to connect to SQLite: {e}")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Copy nba_players.db into the Supabase Postgres database")
+    parser.add_argument('sqlite_path', nargs='?', default=SQLITE_DB_PATH)
+    parser.add_argument('--restart', action='store_true', help="ignore checkpoints and copy everything")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
 
-    try:
-        pg_conn = psycopg2.connect(POSTGRES_CONN_INFO)
-        print("✅ Connected to Supabase PostgreSQL.")
-    except Exception as e:
-        print(f"❌ Failed to connect to Supabase PostgreSQL: {e}")
-        sqlite_conn.close()
+    pg_url = postgres_url()
+    if not pg_url:
+        print("❌ SUPABASE_DB_URL is not set (environment or .env)")
         sys.exit(1)
 
-    try:
-        migrate_players(sqlite_conn, pg_conn)
-        migrate_stints(sqlite_conn, pg_conn)
-    except Exception as e:
-        print(f"❌ Migration error: {e}")
-    finally:
-        sqlite_conn.close()
-        pg_conn.close()
-        print("🔒 Closed both database connections.")
+    started = time.time()
+    results = migrate(args.sqlite_path, pg_url, restart=args.restart, chunk_rows=args.chunk_rows)
+    failed = False
+    for table, result in results.items():
+        if isinstance(result, Exception):
+            failed = True
+            print(f"❌ {table}: {result} (re-run to resume from the last checkpoint)")
+        else:
+            print(f"✅ {table}: {result[0]} rows")
+    print(f"🏁 Done in {time.time() - started:.1f}s")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+# migrations.py
+#
+# Owns the nba_players.db schema. Each migration runs once, in order, in its
+# own transaction; PRAGMA user_version records the last one applied. The
+# early steps use IF NOT EXISTS, so databases built by the old create_*.py
+# scripts upgrade in place.
+#
+# Rows of the SYNCED_TABLES are change-tracked by triggers into sync_changes
+# for sync_postgres.py.
+#
+# Stint dates are stored as day numbers (date.toordinal(), see stint_index)
+# and seasons as their start year (2024 = 2024-25), so range filters compare
+# plain integers.
+#
+# connect() opens a connection with the tuned PRAGMA profile, and
+# check_query_plans() runs EXPLAIN QUERY PLAN on the hot queries and fails
+# loudly if one of them no longer uses its index.
+#
+#   python migrations.py [db_path]
+
+import sqlite3
+import sys
+
+from franchises import normalize_team_id
+
+DB_PATH = 'nba_players.db'
+
+# Connection profile: WAL lets the games read while a scrape writes, NORMAL
+# sync is safe under WAL, and the page cache / mmap keep the hot indexes in memory
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA cache_size = -65536",  # 64 MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 30000",
+)
+
+
+# julianday() of day 0 in date.toordinal() numbering
+ORDINAL_EPOCH = 1721424.5
+
+STINT_TABLE = '''
+    CREATE TABLE player_team_stints (
+        player_id INTEGER NOT NULL,
+        team_abbr TEXT NOT NULL,
+        stint_number INTEGER NOT NULL,
+        start_season INTEGER NOT NULL,
+        end_season INTEGER NOT NULL,
+        start_day INTEGER NOT NULL,
+        end_day INTEGER NOT NULL,
+        PRIMARY KEY (player_id, team_abbr, stint_number)
+    ) WITHOUT ROWID
+'''
+STINTS_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_stints_team_days
+        ON player_team_stints (team_abbr, start_day, end_day, player_id)
+'''
+
+# Tables mirrored to Postgres, with their key columns
+SYNCED_TABLES = {
+    'players': ('player_id',),
+    'player_team_stints': ('player_id', 'team_abbr', 'stint_number'),
+}
+
+
+class QueryPlanError(Exception):
+    pass
+
+
+def connect(db_path=DB_PATH, **kwargs):
+    conn = sqlite3.connect(db_path, **kwargs)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _encode_stints(conn):
+    # Creates the integer layout, or converts an old text one; a no-op once converted
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(player_team_stints)")}
+    if not columns:
+        conn.execute(STINT_TABLE)
+        return
+    if 'start_day' in columns:
+        return
+    conn.execute(STINT_TABLE.replace('player_team_stints', 'player_team_stints_new', 1))
+    # Seasons are either '2024' (from SEASON_ID) or '2024-25'; dates may carry a time
+    conn.execute(f'''
+        INSERT INTO player_team_stints_new
+        SELECT player_id, team_abbr, stint_number,
+               CAST(substr(start_season, 1, 4) AS INTEGER),
+               CAST(substr(end_season, 1, 4) AS INTEGER),
+               CAST(julianday(substr(start_date, 1, 10)) - {ORDINAL_EPOCH} AS INTEGER),
+               CAST(julianday(substr(end_date, 1, 10)) - {ORDINAL_EPOCH} AS INTEGER)
+        FROM player_team_stints
+    ''')
+    # Takes the old date index with it
+    conn.execute("DROP TABLE player_team_stints")
+    conn.execute("ALTER TABLE player_team_stints_new RENAME TO player_team_stints")
+
+
+def _backfill_stint_days(conn):
+    _encode_stints(conn)
+    conn.execute(STINTS_INDEX)
+
+
+def _add_change_log(conn):
+    # sync_source.id names this database file, so a rebuilt one is never
+    # mistaken for the one a Postgres watermark was acknowledged against
+    conn.execute('''
+        CREATE TABLE sync_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL
+        )
+    ''')
+    conn.execute("CREATE TABLE sync_source (id TEXT NOT NULL)")
+    conn.execute("INSERT INTO sync_source (id) VALUES (lower(hex(randomblob(16))))")
+    for table, keys in SYNCED_TABLES.items():
+        new_key = f"json_array({', '.join('NEW.' + k for k in keys)})"
+        old_key = f"json_array({', '.join('OLD.' + k for k in keys)})"
+        log = f"INSERT INTO sync_changes (table_name, row_key) SELECT '{table}', "
+        conn.execute(f'''
+            CREATE TRIGGER sync_{table}_insert AFTER INSERT ON {table}
+            BEGIN {log}{new_key}; END
+        ''')
+        # A key change is a delete of the old key plus an insert of the new one
+        conn.execute(f'''
+            CREATE TRIGGER sync_{table}_update AFTER UPDATE ON {table}
+            BEGIN
+                {log}{new_key};
+                {log}{old_key} WHERE {old_key} IS NOT {new_key};
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER sync_{table}_delete AFTER DELETE ON {table}
+            BEGIN {log}{old_key}; END
+        ''')
+
+
+def _add_franchise_ids(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(player_teams)")}
+    if 'franchise_id' not in columns:
+        conn.execute("ALTER TABLE player_teams ADD COLUMN franchise_id TEXT")
+    # Resolve every team to its canonical franchise once, by abbreviation
+    team_rows = conn.execute("SELECT team_id, team_abbr FROM teams").fetchall()
+    conn.executemany(
+        "UPDATE player_teams SET franchise_id = ? WHERE team_id = ? AND franchise_id IS NULL",
+        [(normalize_team_id(team_abbr), team_id) for team_id, team_abbr in team_rows]
+    )
+
+
+# (version, description, SQL script or function(conn))
+MIGRATIONS = [
+    (1, "core tables", '''
+        CREATE TABLE IF NOT EXISTS teams (
+            team_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_abbr TEXT UNIQUE NOT NULL,
+            team_name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS players (
+            player_id INTEGER PRIMARY KEY,
+            player_name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS player_teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            UNIQUE(player_id, team_id, season),
+            FOREIGN KEY(player_id) REFERENCES players(player_id),
+            FOREIGN KEY(team_id) REFERENCES teams(team_id)
+        );
+    '''),
+    (2, "player_team_stints", _encode_stints),
+    (3, "player_teams.franchise_id", _add_franchise_ids),
+    # Indexes come after every table step so a bulk load (rebuild_db) can
+    # stop at TABLES_VERSION, load, then build them in one pass
+    (4, "hot-path indexes", '''
+        CREATE INDEX IF NOT EXISTS idx_player_teams_franchise_season
+            ON player_teams (franchise_id, season, player_id);
+        CREATE INDEX IF NOT EXISTS idx_player_teams_player_franchise
+            ON player_teams (player_id, franchise_id, season);
+        CREATE INDEX IF NOT EXISTS idx_player_teams_team_season
+            ON player_teams (team_id, season, player_id);
+    ''' + STINTS_INDEX),
+    # One-time backfill for databases whose step 2 still created text dates
+    (5, "integer stint days and seasons", _backfill_stint_days),
+    # After rebuild_db's bulk load, so the load itself is never logged
+    (6, "change log for sync", _add_change_log),
+    # IF NOT EXISTS: JobJournal / DeadLetterQueue used to create these themselves
+    (7, "ingest job journal and dead-letter queue", '''
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            job TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (job, player_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_ingest_jobs_state ON ingest_jobs (job, state);
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            job TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            error TEXT,
+            attempts INTEGER NOT NULL,
+            priority INTEGER NOT NULL,
+            failed_at REAL NOT NULL,
+            next_eligible_at REAL NOT NULL,
+            PRIMARY KEY (job, player_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_dead_letters_eligible
+            ON dead_letters (priority DESC, next_eligible_at);
+    '''),
+]
+TABLES_VERSION = 3
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=None):
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= schema_version(conn) or version > target:
+            continue
+        # IMMEDIATE takes the write lock up front; re-check under it, since
+        # another tool may have applied this step while we waited
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= schema_version(conn):
+                conn.rollback()
+                continue
+            if callable(step):
+                step(conn)
+            else:
+                # executescript would commit; run the statements inside our transaction
+                for statement in step.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
+
+
+# (name, query, params, index the plan must use)
+HOT_QUERIES = [
+    ("stint teammates",
+     """SELECT DISTINCT b.player_id FROM player_team_stints a
+        JOIN player_team_stints b
+          ON b.team_abbr = a.team_abbr AND b.start_day <= a.end_day AND b.end_day >= a.start_day
+        WHERE a.player_id = ?""",
+     (0,), "idx_stints_team_days"),
+    ("season teammates",
+     """SELECT DISTINCT b.player_id FROM player_teams a
+        JOIN player_teams b ON b.team_id = a.team_id AND b.season = a.season
+        WHERE a.player_id = ?""",
+     (0,), "idx_player_teams_team_season"),
+    ("franchise teammates",
+     """SELECT DISTINCT b.player_id FROM player_teams a
+        JOIN player_teams b ON b.franchise_id = a.franchise_id AND b.season = a.season
+        WHERE a.player_id = ?""",
+     (0,), "idx_player_teams_franchise_season"),
+    ("team roster for a season",
+     "SELECT player_id FROM player_teams WHERE team_id = ? AND season = ?",
+     (0, ''), "idx_player_teams_team_season"),
+    ("team stints overlapping a range",
+     "SELECT player_id FROM player_team_stints WHERE team_abbr = ? AND start_day <= ? AND end_day >= ?",
+     ('', 0, 0), "idx_stints_team_days"),
+]
+
+
+def check_query_plans(conn):
+    problems = []
+    for name, query, params, index in HOT_QUERIES:
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+        if not any(index in detail for detail in plan):
+            problems.append(f"{name}: expected {index}, got {' | '.join(plan)}")
+    if problems:
+        raise QueryPlanError("Hot queries are missing their indexes:\n  " + "\n  ".join(problems))
+
+
+if __name__ == "__main__":
+    conn = connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    before = schema_version(conn)
+    for version, description in migrate(conn):
+        print(f"✅ Applied migration {version}: {description}")
+    print(f"📐 Schema version {before} → {schema_version(conn)}")
+    check_query_plans(conn)
+    print(f"✅ {len(HOT_QUERIES)} hot queries use their indexes")
+    conn.close()
@@ -0,0 +1,81 @@
+# name_resolver.py
+#
+# Name -> player id resolution shared by the scrapers and the game validators.
+# Names are normalized once (accents, case and punctuation dropped, see
+# player_search.normalize_name) into a hash index, so resolving a list of
+# names costs one dict lookup each. Misses fall back to a fuzzy match whose
+# candidates are narrowed with a character trigram index first.
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+from player_search import normalize_name
+
+FUZZY_CANDIDATES = 10
+FUZZY_CUTOFF = 0.85
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameResolver:
+    def __init__(self, players):
+        """players: iterable of (player_id, player_name)."""
+        self.names = {}
+        self.by_key = {}
+        self.grams = {}
+        for pid, name in players:
+            self.names[pid] = name
+            key = normalize_name(name)
+            # Keep the first id for duplicate names, like the old list scans did
+            if key not in self.by_key:
+                self.by_key[key] = pid
+                for gram in _trigrams(key):
+                    self.grams.setdefault(gram, []).append(key)
+
+    @classmethod
+    def from_nba_api(cls, player_dicts):
+        # players.get_players() returns dicts with 'id' and 'full_name'
+        return cls((p['id'], p['full_name']) for p in player_dicts)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def name_of(self, player_id):
+        return self.names.get(player_id)
+
+    def _fuzzy(self, key):
+        counts = Counter()
+        for gram in _trigrams(key):
+            counts.update(self.grams.get(gram, ()))
+        best, best_score = None, FUZZY_CUTOFF
+        for candidate, _ in counts.most_common(FUZZY_CANDIDATES):
+            score = SequenceMatcher(None, key, candidate).ratio()
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def resolve(self, name, fuzzy=True):
+        key = normalize_name(name)
+        if not key:
+            return None
+        pid = self.by_key.get(key)
+        if pid is None and fuzzy:
+            match = self._fuzzy(key)
+            if match is not None:
+                pid = self.by_key[match]
+        return pid
+
+    def resolve_many(self, names, fuzzy=True):
+        # Returns (name -> player_id, unresolved names)
+        resolved = {}
+        missing = []
+        for name in names:
+            pid = self.resolve(name, fuzzy)
+            if pid is None:
+                missing.append(name)
+            else:
+                resolved[name] = pid
+        return resolved, missing
@@ -0,0 +1,125 @@
+# nba_fetch.py
+#
+# nba_api requests used by the scrapers, served from the shared ResponseCache.
+# Raw response dicts are cached, so a re-run only reaches the network for
+# missing or stale entries. Retired players' data never changes, so their
+# entries live much longer than active players'.
+#
+# The endpoint modules (which pull in pandas) are only imported on a cache
+# miss, and career stats are read straight from the raw rowSet, so the
+# career scrapers never build a DataFrame.
+#
+# nba_api reads a throttled response's body as JSON and drops its status and
+# headers, so a 429 would surface as a decode error. A response hook on its
+# session raises requests' HTTPError instead, which carries both, so the
+# ingest engine can tell throttling (and Retry-After) from other failures.
+
+import time
+
+from nba_api.stats.library.parameters import SeasonAll
+from nba_api.stats.static import players
+
+from response_cache import DAY, ResponseCache
+
+ACTIVE_TTL = 1 * DAY
+INACTIVE_TTL = 365 * DAY
+
+CAREER_STATS = 'PlayerCareerStats'
+GAME_LOG = 'PlayerGameLog'
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def _raise_for_status(response, *args, **kwargs):
+    response.raise_for_status()
+
+
+def _endpoint_session():
+    # Called before each request; installs the hook once
+    from nba_api.stats.library.http import NBAStatsHTTP
+    hooks = NBAStatsHTTP.get_session().hooks['response']
+    if _raise_for_status not in hooks:
+        hooks.append(_raise_for_status)
+
+
+def ttl_for(player_id, is_active=None):
+    if is_active is None:
+        # Static player list ships with nba_api, no request needed
+        player = players.find_player_by_id(player_id)
+        is_active = bool(player and player['is_active'])
+    return ACTIVE_TTL if is_active else INACTIVE_TTL
+
+
+def _cached(endpoint, params, load, ttl, refresh, cache_only):
+    # refresh=True always hits the network and replaces the cached entry;
+    # delta runs need today's data even if yesterday's is still "fresh".
+    # cache_only=True never does: a fresh cached response or None.
+    cache = get_cache()
+    if cache_only:
+        return cache.get(endpoint, params)
+    if refresh:
+        payload = load()
+        cache.put(endpoint, params, payload, ttl)
+        return payload
+    return cache.get_or_fetch(endpoint, params, load, ttl)
+
+
+def career_stats(player_id, is_active=None, delay=0, refresh=False, cache_only=False):
+    def load():
+        from nba_api.stats.endpoints import playercareerstats
+        _endpoint_session()
+        raw = playercareerstats.PlayerCareerStats(player_id=player_id).get_dict()
+        time.sleep(delay)  # be kind to the API
+        return raw
+    return _cached(CAREER_STATS, {'player_id': player_id}, load, ttl_for(player_id, is_active), refresh, cache_only)
+
+
+def game_log(player_id, is_active=None, delay=0, season=SeasonAll.all, refresh=False, cache_only=False):
+    # season is SeasonAll.all for the whole career or a label like '2024-25'
+    def load():
+        from nba_api.stats.endpoints import playergamelog
+        _endpoint_session()
+        raw = playergamelog.PlayerGameLog(player_id=player_id, season=season).get_dict()
+        time.sleep(delay)
+        return raw
+    params = {'player_id': player_id, 'season': season}
+    return _cached(GAME_LOG, params, load, ttl_for(player_id, is_active), refresh, cache_only)
+
+
+def result_rows(raw, index=0):
+    # Column index by header plus the raw row lists; no DataFrame needed
+    result_sets = raw.get('resultSets') or [raw['resultSet']]
+    result = result_sets[index]
+    return {header: i for i, header in enumerate(result['headers'])}, result['rowSet']
+
+
+def career_team_seasons(raw, team_lookup):
+    # (team_abbr, team_full_name, season) for every career row whose team is in team_lookup
+    col, rows = result_rows(raw)
+    abbr_i = col['TEAM_ABBREVIATION']
+    season_i = col['SEASON_ID']
+    team_seasons = []
+    for row in rows:
+        team_abbr = row[abbr_i]
+        season = row[season_i]
+        if not team_abbr or not season:
+            continue
+        team_full_name = team_lookup.get(team_abbr)
+        if team_full_name:
+            team_seasons.append((team_abbr, team_full_name, season))
+    return team_seasons
+
+
+def result_frame(raw, index=0):
+    # Same frame as endpoint.get_data_frames()[index]. Only the game log path
+    # still wants pandas, so it isn't imported until needed.
+    import pandas as pd
+    col, rows = result_rows(raw, index)
+    return pd.DataFrame(rows, columns=list(col))
@@ -0,0 +1,74 @@
+# player_search.py
+#
+# Ranked prefix search over player names for autocomplete. Every token suffix
+# of a normalized name is a key ("kareem abdul jabbar", "abdul jabbar",
+# "jabbar"), so typing a first name, last name or "first la" all hit a
+# contiguous range of one sorted key array. Top-N lists for one- and
+# two-character prefixes are precomputed because those ranges are the largest.
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+
+DEFAULT_LIMIT = 20
+PRECOMPUTED_PREFIX_LEN = 2
+
+
+def normalize_name(name):
+    # "Nikola Jokić" -> "nikola jokic", "Shaquille O'Neal" -> "shaquille oneal",
+    # "Abdul-Jabbar" -> "abdul jabbar"
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"['’.]", '', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    return text.strip()
+
+
+class PlayerSearchIndex:
+    def __init__(self, players, popularity=None, limit=DEFAULT_LIMIT):
+        """players: iterable of (player_id, player_name); popularity: player_id -> score."""
+        popularity = popularity or {}
+        self.limit = limit
+        self.player_ids = []
+        self.names = []
+        self.ranks = []
+
+        entries = []
+        for pid, name in players:
+            i = len(self.player_ids)
+            self.player_ids.append(pid)
+            self.names.append(name)
+            self.ranks.append((-popularity.get(pid, 0), name))
+            tokens = normalize_name(name).split()
+            for start in range(len(tokens)):
+                entries.append((' '.join(tokens[start:]), i))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.entries = [i for _, i in entries]
+
+        buckets = {}
+        for key, i in entries:
+            for n in range(1, PRECOMPUTED_PREFIX_LEN + 1):
+                if len(key) >= n:
+                    buckets.setdefault(key[:n], set()).add(i)
+        self.top = {prefix: self._best(found, limit) for prefix, found in buckets.items()}
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def _best(self, indices, limit):
+        return heapq.nsmallest(limit, indices, key=self.ranks.__getitem__)
+
+    def search(self, text, limit=None):
+        limit = limit or self.limit
+        query = normalize_name(text)
+        if not query:
+            return []
+        if len(query) <= PRECOMPUTED_PREFIX_LEN and limit <= self.limit:
+            best = self.top.get(query, [])[:limit]
+        else:
+            lo = bisect_left(self.keys, query)
+            hi = bisect_left(self.keys, query + '\uffff', lo)
+            best = self._best(set(self.entries[lo:hi]), limit)
+        return [(self.player_ids[i], self.names[i]) for i in best]
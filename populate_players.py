@@ -1,8 +1,9 @@
 from nba_api.stats.static import players
-from nba_api.stats.endpoints import PlayerCareerStats
-import time
 from collections import defaultdict
 
+from name_resolver import NameResolver
+from nba_fetch import career_stats, result_rows
+
 # Step 1: Define your player list
 target_players = ['LeBron James', 'Kevin Durant', 'Stephen Curry']
 
@@ -10,7 +11,7 @@ target_players = ['LeBron James', 'Kevin Durant', 'Stephen Curry']
 all_players = players.get_players()
 
 # Step 3: Map names to player IDs
-player_id_map = {p['full_name']: p['id'] for p in all_players if p['full_name'] in target_players}
+player_id_map, _ = NameResolver.from_nba_api(all_players).resolve_many(target_players)
 
 # Step 4: Fetch team + season data
 player_team_data = defaultdict(lambda: defaultdict(list))
@@ -22,13 +23,11 @@ for name in target_players:
         continue
 
     try:
-        stats = PlayerCareerStats(player_id=player_id)
-        time.sleep(0.6)  # Avoid rate limits
-        df = stats.get_data_frames()[0]
+        col, rows = result_rows(career_stats(player_id, delay=0.6))
 
-        for _, row in df.iterrows():
-            season = row['SEASON_ID']
-            team = row['TEAM_ABBREVIATION']
+        for row in rows:
+            season = row[col['SEASON_ID']]
+            team = row[col['TEAM_ABBREVIATION']]
             player_team_data[name][team].append(season)
 
     except Exception as e:
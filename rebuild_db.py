@@ -0,0 +1,147 @@
+# rebuild_db.py
+#
+# Rebuild nba_players.db offline from the raw responses in the ResponseCache.
+# Cached career stats and game logs are parsed across a process pool (one
+# worker per core), bulk-loaded into a fresh SQLite file and copied over the
+# live one with SQLite's backup API, so a change to the parsing logic (e.g.
+# stint detection) never needs a re-scrape. No network access is needed: player and team
+# names come from nba_api's bundled static data.
+#
+#   python rebuild_db.py [db_path]
+
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from nba_api.stats.library.parameters import SeasonAll
+from nba_api.stats.static import players, teams
+
+from db_writer import STINT_SQL, stint_row
+from franchises import HISTORICAL_TEAM_ABBRS, normalize_team_id
+from migrations import TABLES_VERSION, connect, migrate
+from nba_fetch import CAREER_STATS, GAME_LOG, result_frame, result_rows
+from response_cache import ResponseCache, read_payload
+from stint_scraper import detect_stints
+
+DB_PATH = 'nba_players.db'
+CHUNK_SIZE = 32  # cache entries handed to a worker at a time
+INSERT_BATCH = 5000
+
+TEAM_NAMES = {t['abbreviation']: t['full_name'] for t in teams.get_teams()}
+KNOWN_TEAMS = set(TEAM_NAMES) | HISTORICAL_TEAM_ABBRS
+
+
+def parse_career_file(entry):
+    params, path = entry
+    raw = read_payload(path)
+    if raw is None:
+        return []
+    col, career_rows = result_rows(raw)
+    rows = []
+    for row in career_rows:
+        team_abbr = row[col['TEAM_ABBREVIATION']]
+        season = row[col['SEASON_ID']]
+        if team_abbr and season and team_abbr in KNOWN_TEAMS:
+            rows.append((params['player_id'], team_abbr, season))
+    return rows
+
+
+def merge_game_logs(raws):
+    # One game log from a player's cached entries: the full-career log plus
+    # the per-season ones delta_ingest adds on top, each game counted once
+    headers, games = None, {}
+    for raw in raws:
+        col, rows = result_rows(raw)
+        if headers is None:
+            headers = list(col)
+        game_i = col.get('Game_ID', col.get('GAME_ID'))
+        for row in rows:
+            by_header = dict(zip(col, row))
+            key = row[game_i] if game_i is not None else (by_header['GAME_DATE'], by_header['MATCHUP'])
+            games[key] = [by_header.get(h) for h in headers]
+    return {'resultSets': [{'headers': headers or [], 'rowSet': list(games.values())}]}
+
+
+def parse_gamelog_file(entry):
+    player_id, paths = entry
+    raws = [raw for raw in map(read_payload, paths) if raw is not None]
+    if not raws:
+        return player_id, []
+    return player_id, detect_stints(result_frame(merge_game_logs(raws)))
+
+
+def _flush(cursor, sql, rows):
+    if rows:
+        cursor.executemany(sql, rows)
+        rows.clear()
+
+
+def rebuild(db_path=DB_PATH, workers=None):
+    started = time.time()
+    cache = ResponseCache()
+    careers = cache.entry_paths(CAREER_STATS)
+    # Per player, so the full log and later season logs give one set of stints
+    game_logs = {}
+    for params, path in sorted(cache.entry_paths(GAME_LOG), key=lambda e: e[0].get('season') != SeasonAll.all):
+        game_logs.setdefault(params['player_id'], []).append(path)
+    print(f"📦 {len(careers)} cached career stats, game logs for {len(game_logs)} players")
+
+    tmp_path = db_path + '.rebuild'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    cursor = conn.cursor()
+    # Tables only; the index migration runs after the bulk load
+    migrate(conn, target=TABLES_VERSION)
+
+    cursor.executemany(
+        "INSERT INTO players (player_id, player_name) VALUES (?, ?)",
+        ((p['id'], p['full_name']) for p in players.get_players())
+    )
+
+    team_ids = {}
+    pending = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for rows in pool.map(parse_career_file, careers, chunksize=CHUNK_SIZE):
+            for player_id, team_abbr, season in rows:
+                team_id = team_ids.setdefault(team_abbr, len(team_ids) + 1)
+                pending.append((player_id, team_id, season, normalize_team_id(team_abbr)))
+            if len(pending) >= INSERT_BATCH:
+                _flush(cursor, "INSERT OR IGNORE INTO player_teams (player_id, team_id, season, franchise_id) "
+                               "VALUES (?, ?, ?, ?)", pending)
+        _flush(cursor, "INSERT OR IGNORE INTO player_teams (player_id, team_id, season, franchise_id) "
+                       "VALUES (?, ?, ?, ?)", pending)
+
+        for player_id, team_stints in pool.map(parse_gamelog_file, game_logs.items(), chunksize=CHUNK_SIZE):
+            for i, stint in enumerate(team_stints):
+                pending.append(stint_row(player_id, i + 1, stint))
+            if len(pending) >= INSERT_BATCH:
+                _flush(cursor, STINT_SQL, pending)
+        _flush(cursor, STINT_SQL, pending)
+
+    cursor.executemany(
+        "INSERT INTO teams (team_id, team_abbr, team_name) VALUES (?, ?, ?)",
+        ((team_id, abbr, TEAM_NAMES.get(abbr, abbr)) for abbr, team_id in team_ids.items())
+    )
+    conn.commit()
+    migrate(conn)
+
+    # One backup step under SQLite's own locking: readers see either the old
+    # database or the complete new one. Renaming over a live WAL database would
+    # leave its -wal file to be replayed over the new pages.
+    live = connect(db_path)
+    try:
+        conn.backup(live)
+    finally:
+        live.close()
+        conn.close()
+    os.remove(tmp_path)
+    print(f"✅ Rebuilt {db_path} in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    rebuild(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
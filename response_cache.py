@@ -0,0 +1,135 @@
+# response_cache.py
+#
+# Content-addressed on-disk cache of raw nba_api responses.
+#
+#   key   = sha256 of the endpoint name and its (sorted) parameters
+#   file  = CACHE_DIR/<key[:2]>/<key>.json.z   (zlib-compressed JSON)
+#   index = CACHE_DIR/index.db                 (expiry, size and last access per key)
+#
+# Each entry has its own TTL, so retired players can be kept far longer than
+# active ones. When the cache grows past max_bytes the least recently used
+# entries are evicted.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_DIR = 'nba_cache'
+MAX_BYTES = 1024 ** 3  # 1 GB of compressed payloads
+EVICT_TO = 0.9  # evict down to this fraction of max_bytes
+DAY = 24 * 60 * 60
+
+
+def cache_key(endpoint, params):
+    blob = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def read_payload(path):
+    try:
+        with open(path, 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+    except (OSError, zlib.error, ValueError):
+        return None
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        # Fetch workers call in from several threads; one lock guards the index
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                params TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_endpoint ON entries (endpoint)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json.z')
+
+    def _read(self, key):
+        return read_payload(self._path(key))
+
+    def get(self, endpoint, params, allow_stale=False):
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[0] < now and not allow_stale):
+                return None
+            self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        return self._read(key)
+
+    def put(self, endpoint, params, payload, ttl):
+        key = cache_key(endpoint, params)
+        data = zlib.compress(json.dumps(payload).encode('utf-8'))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.total_bytes += len(data) - (row[0] if row else 0)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, json.dumps(params, sort_keys=True, default=str), len(data), now, now + ttl, now)
+            )
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        target = self.max_bytes * EVICT_TO
+        rows = self.conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= size
+
+    def get_or_fetch(self, endpoint, params, loader, ttl):
+        # Only stale or missing entries reach the network
+        payload = self.get(endpoint, params)
+        if payload is None:
+            payload = loader()
+            self.put(endpoint, params, payload, ttl)
+        return payload
+
+    def entry_paths(self, endpoint):
+        # (params, file path) for every cached response of an endpoint, fresh or stale
+        with self._lock:
+            rows = self.conn.execute("SELECT key, params FROM entries WHERE endpoint = ?", (endpoint,)).fetchall()
+        return [(json.loads(params), self._path(key)) for key, params in rows]
+
+    def entries(self, endpoint):
+        # (params, payload) for every cached response of an endpoint, fresh or stale
+        for params, path in self.entry_paths(endpoint):
+            payload = read_payload(path)
+            if payload is not None:
+                yield params, payload
@@ -0,0 +1,79 @@
+# retry_failed.py
+#
+# Drain the dead-letter queue: refetch only the players whose fetch failed,
+# current players first, instead of rescanning everyone. Entries still inside
+# their backoff window are left alone; successes are removed from the queue
+# and failures go back with a longer backoff.
+#
+#   python retry_failed.py                      # every job, all eligible entries
+#   python retry_failed.py stints --limit 100   # one job, at most 100 players
+#   python retry_failed.py --list               # what's queued, by job and reason
+
+import argparse
+
+from nba_api.stats.static import players
+
+import missing_years_fix
+import scraper_batches
+import stint_scraper
+from dead_letters import DeadLetterQueue
+from migrations import connect, migrate
+
+DB_PATH = 'nba_players.db'
+
+RETRY_HANDLERS = {
+    scraper_batches.JOB: scraper_batches.retry_players,
+    missing_years_fix.JOB: missing_years_fix.retry_players,
+    stint_scraper.JOB: stint_scraper.retry_players,
+}
+
+
+def player_task(player_id):
+    # The retry handlers take nba_api-style player dicts
+    player = players.find_player_by_id(player_id)
+    if player is None:
+        return {'id': player_id, 'full_name': str(player_id), 'is_active': False}
+    return player
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retry failed fetches from the dead-letter queue")
+    parser.add_argument('jobs', nargs='*', help=f"jobs to retry: {', '.join(RETRY_HANDLERS)} (default: all)")
+    parser.add_argument('--limit', type=int, help="retry at most this many players")
+    parser.add_argument('--list', action='store_true', help="show the queue and exit")
+    args = parser.parse_args()
+    unknown = set(args.jobs) - set(RETRY_HANDLERS)
+    if unknown:
+        parser.error(f"unknown job(s): {', '.join(sorted(unknown))}")
+
+    conn = connect(DB_PATH)
+    migrate(conn)
+    dead_letters = DeadLetterQueue(conn)
+    if args.list:
+        for job, reason, count, max_attempts in dead_letters.summary():
+            print(f"{job:20} {reason:15} {count:6}  (up to {max_attempts} attempts)")
+        conn.close()
+        return
+
+    entries = dead_letters.eligible(args.jobs, args.limit)
+    conn.close()
+    if not entries:
+        print("✅ Nothing eligible for retry")
+        return
+
+    # Keep the queue's priority order within each job
+    by_job = {}
+    for job, player_id, reason, attempts in entries:
+        by_job.setdefault(job, []).append(player_task(player_id))
+
+    for job, player_list in by_job.items():
+        handler = RETRY_HANDLERS.get(job)
+        if handler is None:
+            print(f"⚠️ No retry handler for job {job}; skipping {len(player_list)} players")
+            continue
+        print(f"🔁 Retrying {len(player_list)} players for {job}")
+        handler(player_list)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,19 @@
-import sqlite3
-import time
-import random
-import logging
 from nba_api.stats.static import players, teams
-from nba_api.stats.endpoints import playercareerstats
-from requests.exceptions import ReadTimeout, HTTPError
+
+from db_writer import WriterThread
+from franchises import HISTORICAL_TEAM_ABBRS
+from ingest_engine import IngestEngine, RateController
+from job_journal import JobJournal
+from migrations import connect, migrate
+from nba_fetch import career_stats, career_team_seasons
 
 
 # Constants
 DB_PATH = 'nba_players.db'
-FAILED_LOG = 'failed_players.log'
-MAX_RETRIES = 5
-INITIAL_DELAY = 1
-MAX_DELAY = 30
+REQUESTS_PER_SECOND = 0.5
+CONCURRENCY = 4
 BATCH_SIZE = 200
-SLEEP_BETWEEN_BATCHES = 3600  # 1 hour
-
-# Logging setup
-logging.basicConfig(filename=FAILED_LOG, level=logging.INFO)
-
-# Historical team abbreviations
-HISTORICAL_TEAM_ABBRS = {
-    'PHL', 'CIN', 'SEA', 'BUF', 'VAN', 'GOS', 'SYR', 'PIT', 'BOM', 'BAL',
-    'SDR', 'NJN', 'CHH', 'NOJ', 'KCK', 'SAN', 'NOH', 'SFW', 'NOK', 'UTH',
-    'SDC', 'STL', 'NYN', 'PHW', 'FTW', 'DEF', 'BLT', 'CHS', 'INO', 'DN',
-    'CLR', 'MNL', 'TCB', 'PRO', 'MIH', 'CHP', 'CHZ', 'HUS', 'JET', 'AND',
-    'WAT', 'SHE', 'ROC'
-}
+JOB = 'historical_careers'
 
 
 def get_existing_player_ids(cursor):
@@ -34,34 +21,19 @@ def get_existing_player_ids(cursor):
     return {row[0] for row in cursor.fetchall()}
 
 
-def get_team_id(cursor, team_abbr, team_full_name):
-    cursor.execute("SELECT team_id FROM teams WHERE team_abbr = ?", (team_abbr,))
-    row = cursor.fetchone()
-    if row:
-        return row[0]
-    cursor.execute("INSERT INTO teams (team_abbr, team_name) VALUES (?, ?)", (team_abbr, team_full_name))
-    return cursor.lastrowid
-
-
-def insert_player(cursor, player_id, player_name):
-    cursor.execute("SELECT player_id FROM players WHERE player_id = ?", (player_id,))
-    if cursor.fetchone() is None:
-        cursor.execute("INSERT INTO players (player_id, player_name) VALUES (?, ?)", (player_id, player_name))
+def fetch_career(player):
+    return career_stats(player['id'], player.get('is_active'))
 
 
-def insert_player_team(cursor, player_id, team_id, season):
-    try:
-        cursor.execute(
-            "INSERT OR IGNORE INTO player_teams (player_id, team_id, season) VALUES (?, ?, ?)",
-            (player_id, team_id, season)
-        )
-    except sqlite3.IntegrityError:
-        pass
+def cached_career(player):
+    return career_stats(player['id'], player.get('is_active'), cache_only=True)
 
 
-def scrape_batch(start_index, player_list):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def scrape_batch(start_index, player_list, controller=None):
+    conn = connect(DB_PATH)
+    migrate(conn)
+    journal = JobJournal(conn)
+    writer_thread = WriterThread(DB_PATH).start()
 
     nba_teams = teams.get_teams()
     historical_teams = [{'abbreviation': abbr, 'full_name': abbr} for abbr in HISTORICAL_TEAM_ABBRS]
@@ -70,78 +42,72 @@ def scrape_batch(start_index, player_list):
     end_index = min(start_index + BATCH_SIZE, len(player_list))
     print(f"📦 Processing batch: {start_index}–{end_index - 1}")
 
-    for idx in range(start_index, end_index):
-        player = player_list[idx]
-        player_id = player['id']
-        player_name = player['full_name']
-
-        insert_player(cursor, player_id, player_name)
-        conn.commit()
-
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                time.sleep(2)
-                career = playercareerstats.PlayerCareerStats(player_id=player_id)
-                career_data = career.get_data_frames()[0]
-                break
-            except (HTTPError, ReadTimeout, Exception) as e:
-                delay = min(INITIAL_DELAY * 2 ** (attempt - 1), MAX_DELAY) + random.uniform(0, 1)
-                print(f"⚠️ Error fetching {player_name} (Attempt {attempt}): {e}")
-                if attempt == MAX_RETRIES:
-                    logging.info(f"{player_id},{player_name}")
-                    print(f"❌ Failed after {MAX_RETRIES} attempts")
-                    continue
-                print(f"⏳ Retrying after {delay:.1f} seconds...")
-                time.sleep(delay)
-        else:
-            continue
+    def parse(player, career_data):
+        rows = career_team_seasons(career_data, team_lookup)
 
         # Only save if played for historical team
-        unique_teams = set(career_data['TEAM_ABBREVIATION'].dropna().unique())
-        if not unique_teams.intersection(HISTORICAL_TEAM_ABBRS):
-            continue
+        if not any(team_abbr in HISTORICAL_TEAM_ABBRS for team_abbr, _, _ in rows):
+            return []
 
-        print(f"✅ {player_name} played for historical team")
+        print(f"✅ {player['full_name']} played for historical team")
+        return rows
 
-        for _, row in career_data.iterrows():
-            season = row.get('SEASON_ID')
-            team_abbr = row.get('TEAM_ABBREVIATION')
-            if not team_abbr or not season:
-                continue
-            team_full_name = team_lookup.get(team_abbr)
-            if not team_full_name:
-                continue
-            team_id = get_team_id(cursor, team_abbr, team_full_name)
-            insert_player_team(cursor, player_id, team_id, season)
+    def store(writer, batch):
+        # Runs on the writer thread
+        for player, rows in batch:
+            player_id = player['id']
+            writer.add_player(player_id, player['full_name'])
+            for team_abbr, team_full_name, season in rows:
+                writer.add_player_team(player_id, team_abbr, team_full_name, season)
+            journal.done(writer, JOB, player_id)
 
-        conn.commit()
+    def write(batch):
+        writer_thread.submit(store, batch)
+
+    def on_failure(player, error):
+        # Lands in the dead-letter queue for retry_failed.py
+        writer_thread.submit(journal.fail, JOB, player['id'], error)
+
+    engine = IngestEngine(fetch_career, parse, write, rate=REQUESTS_PER_SECOND, concurrency=CONCURRENCY,
+                          on_failure=on_failure, controller=controller, lookup=cached_career)
+    stats = engine.run(player_list[start_index:end_index])
+    writer_thread.close()
 
     conn.close()
-    print(f"✅ Batch complete: {start_index}–{end_index - 1}")
+    print(f"✅ Batch complete: {start_index}–{end_index - 1} ({stats['rate']} req/s, writer: {writer_thread.stats()})")
 
 
 def scrape_all_auto():
     all_players = players.get_players()
     print(f"🔍 Total NBA players: {len(all_players)}")
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    scraped_ids = get_existing_player_ids(cursor)
+    conn = connect(DB_PATH)
+    migrate(conn)
+    journal = JobJournal(conn)
+    # Players already in the db were finished by runs from before the journal
+    journal.enqueue(JOB, [p['id'] for p in all_players], done_ids=get_existing_player_ids(conn.cursor()))
+    pending_ids = set(journal.claim(JOB))
+    print(f"📋 Journal: {journal.counts(JOB)}")
     conn.close()
 
-    unsaved_players = [p for p in all_players if p['id'] not in scraped_ids]
+    unsaved_players = [p for p in all_players if p['id'] in pending_ids]
 
-    print(f"⏭️ Resuming from index 0 of {len(unsaved_players)} unsaved players")
+    print(f"⏭️ Resuming with {len(unsaved_players)} unsaved players")
 
+    # One controller across batches: the rate it learned carries over, and it
+    # slows down (or honors Retry-After) on its own instead of sleeping an hour
+    controller = RateController(REQUESTS_PER_SECOND, max_rate=REQUESTS_PER_SECOND * 4)
     for i in range(0, len(unsaved_players), BATCH_SIZE):
-        scrape_batch(i, unsaved_players)
-
-        if i + BATCH_SIZE < len(unsaved_players):
-            print(f"⏳ Waiting {SLEEP_BETWEEN_BATCHES // 60} minutes before next batch...")
-            time.sleep(SLEEP_BETWEEN_BATCHES)
+        scrape_batch(i, unsaved_players, controller)
 
     print("🏁 All remaining players processed.")
 
 
+def retry_players(player_list):
+    controller = RateController(REQUESTS_PER_SECOND, max_rate=REQUESTS_PER_SECOND * 4)
+    for i in range(0, len(player_list), BATCH_SIZE):
+        scrape_batch(i, player_list, controller)
+
+
 if __name__ == "__main__":
     scrape_all_auto()
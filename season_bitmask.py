@@ -0,0 +1,107 @@
+# season_bitmask.py
+#
+# Player histories as one integer bitmask of seasons per team:
+#   bit (start_year - FIRST_SEASON) is set if the player was on that team that season.
+# A teammate check is an AND per shared team, and the overlapping seasons are
+# decoded straight from the result.
+
+import datetime
+
+from team_history import HISTORY_PATH, iter_history
+
+FIRST_SEASON = 1946  # 1946-47, the first BAA season
+
+
+def season_start_year(season):
+    # Accepts 2003, '2003', '2003-04'
+    if isinstance(season, int):
+        return season
+    return int(str(season).strip()[:4])
+
+
+def current_season_year(today=None):
+    # Seasons tip off in October; before that the previous season is current
+    today = today or datetime.date.today()
+    return today.year if today.month >= 10 else today.year - 1
+
+
+def season_label(year):
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def season_bit(season):
+    return 1 << (season_start_year(season) - FIRST_SEASON)
+
+
+def decode_seasons(mask):
+    years = []
+    while mask:
+        low = mask & -mask
+        years.append(FIRST_SEASON + low.bit_length() - 1)
+        mask ^= low
+    return years
+
+
+class SeasonHistory:
+    def __init__(self):
+        self.players = {}  # player -> {team: season bitmask}
+
+    @classmethod
+    def from_team_years(cls, data):
+        """Build from {player: {team: [seasons]}}."""
+        history = cls()
+        for player, teams in data.items():
+            history.add_player(player)
+            for team, seasons in teams.items():
+                history.add_seasons(player, team, seasons)
+        return history
+
+    @classmethod
+    def from_history_json(cls, path=HISTORY_PATH):
+        """Build from the player team history written by import_json.py, streamed."""
+        history = cls()
+        for entry in iter_history(path):
+            player = entry['player_name']
+            history.add_player(player)
+            for team in entry.get('teams', []):
+                history.add_seasons(player, team['team_name'], team['years'])
+        return history
+
+    def add_player(self, player):
+        self.players.setdefault(player, {})
+
+    def add_seasons(self, player, team, seasons):
+        teams = self.players.setdefault(player, {})
+        mask = teams.get(team, 0)
+        for season in seasons:
+            mask |= season_bit(season)
+        teams[team] = mask
+
+    def __contains__(self, player):
+        return player in self.players
+
+    def __len__(self):
+        return len(self.players)
+
+    def team_seasons(self, player):
+        return {team: [season_label(y) for y in decode_seasons(mask)]
+                for team, mask in self.players.get(player, {}).items()}
+
+    def shared_seasons(self, player1, player2):
+        if player1 not in self.players or player2 not in self.players:
+            return []
+        p1, p2 = self.players[player1], self.players[player2]
+        if len(p2) < len(p1):
+            p1, p2 = p2, p1
+        shared = []
+        for team, mask in p1.items():
+            overlap = mask & p2.get(team, 0)
+            if overlap:
+                shared.extend((team, season_label(y)) for y in decode_seasons(overlap))
+        return sorted(shared)
+
+    def were_teammates(self, player1, player2):
+        if player1 not in self.players or player2 not in self.players:
+            return False
+        p1, p2 = self.players[player1], self.players[player2]
+        return any(mask & p2.get(team, 0) for team, mask in p1.items())
@@ -0,0 +1,185 @@
+# stint_index.py
+#
+# In-process interval index over player_team_stints. Dates are day numbers
+# (date.toordinal(), as the table stores them), stints are grouped per team
+# and sorted by start day, and each team segment carries an implicit interval
+# tree (max end day per subtree) so overlap queries cost O(log n + k)
+# instead of a SQLite self-join.
+#
+#   teams[t]                                   -> team_abbr of team t (sorted)
+#   starts/ends/stint_players[team_offsets[t]:team_offsets[t + 1]]
+#                                              -> team t's stints, sorted by start day
+#   max_end[p]                                 -> max end day in the subtree rooted at p
+#   player_stints[player_offsets[i]:player_offsets[i + 1]]
+#                                              -> stint positions of player_ids[i]
+
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+from migrations import connect, migrate
+
+DB_PATH = "nba_players.db"
+
+
+def to_day(value):
+    if isinstance(value, int):
+        return value
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def from_day(day):
+    return date.fromordinal(day).isoformat()
+
+
+def _build_max_end(ends, max_end, lo, hi):
+    if lo >= hi:
+        return -1
+    mid = (lo + hi) // 2
+    best = max(
+        ends[mid],
+        _build_max_end(ends, max_end, lo, mid),
+        _build_max_end(ends, max_end, mid + 1, hi),
+    )
+    max_end[mid] = best
+    return best
+
+
+class StintIndex:
+    def __init__(self, teams, team_offsets, starts, ends, stint_players, stint_teams, max_end,
+                 player_ids, player_offsets, player_stints):
+        self.teams = teams
+        self.team_offsets = team_offsets
+        self.starts = starts
+        self.ends = ends
+        self.stint_players = stint_players
+        self.stint_teams = stint_teams
+        self.max_end = max_end
+        self.player_ids = player_ids
+        self.player_offsets = player_offsets
+        self.player_stints = player_stints
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (player_id, team_abbr, start, end) rows; ISO dates or day numbers."""
+        stints = sorted((team, to_day(start), to_day(end), pid) for pid, team, start, end in rows)
+
+        teams = sorted({s[0] for s in stints})
+        team_pos = {team: t for t, team in enumerate(teams)}
+        team_offsets = array('i', [0] * (len(teams) + 1))
+        starts, ends = array('i'), array('i')
+        stint_players, stint_teams = array('i'), array('i')
+        for team, start, end, pid in stints:
+            t = team_pos[team]
+            team_offsets[t + 1] += 1
+            starts.append(start)
+            ends.append(end)
+            stint_players.append(pid)
+            stint_teams.append(t)
+        for t in range(len(teams)):
+            team_offsets[t + 1] += team_offsets[t]
+
+        max_end = array('i', [0] * len(starts))
+        for t in range(len(teams)):
+            _build_max_end(ends, max_end, team_offsets[t], team_offsets[t + 1])
+
+        by_player = {}
+        for pos, pid in enumerate(stint_players):
+            by_player.setdefault(pid, []).append(pos)
+        player_ids = array('i', sorted(by_player))
+        player_offsets = array('i', [0])
+        player_stints = array('i')
+        for pid in player_ids:
+            player_stints.extend(sorted(by_player[pid], key=lambda p: starts[p]))
+            player_offsets.append(len(player_stints))
+
+        return cls(teams, team_offsets, starts, ends, stint_players, stint_teams, max_end,
+                   player_ids, player_offsets, player_stints)
+
+    @classmethod
+    def from_connection(cls, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT player_id, team_abbr, start_day, end_day FROM player_team_stints")
+        return cls.from_rows(cur.fetchall())
+
+    def __contains__(self, player_id):
+        return self._player_index(player_id) is not None
+
+    def _player_index(self, player_id):
+        i = bisect_left(self.player_ids, player_id)
+        if i < len(self.player_ids) and self.player_ids[i] == player_id:
+            return i
+        return None
+
+    def _team_index(self, team_abbr):
+        t = bisect_left(self.teams, team_abbr)
+        if t < len(self.teams) and self.teams[t] == team_abbr:
+            return t
+        return None
+
+    def stints_of(self, player_id):
+        i = self._player_index(player_id)
+        if i is None:
+            return self.player_stints[0:0]
+        return self.player_stints[self.player_offsets[i]:self.player_offsets[i + 1]]
+
+    def days_played(self, player_id):
+        return sum(self.ends[pos] - self.starts[pos] + 1 for pos in self.stints_of(player_id))
+
+    def stint(self, pos):
+        return (self.stint_players[pos], self.teams[self.stint_teams[pos]],
+                from_day(self.starts[pos]), from_day(self.ends[pos]))
+
+    def _overlapping_positions(self, t, start_day, end_day):
+        starts, ends, max_end = self.starts, self.ends, self.max_end
+        stack = [(self.team_offsets[t], self.team_offsets[t + 1])]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if max_end[mid] < start_day:
+                continue
+            stack.append((lo, mid))
+            if starts[mid] <= end_day:
+                if ends[mid] >= start_day:
+                    yield mid
+                stack.append((mid + 1, hi))
+
+    def overlapping(self, team_abbr, start, end):
+        """Stint positions on team_abbr overlapping [start, end] (inclusive)."""
+        t = self._team_index(team_abbr)
+        if t is None:
+            return []
+        return list(self._overlapping_positions(t, to_day(start), to_day(end)))
+
+    def overlapping_players(self, team_abbr, start, end):
+        return {self.stint_players[pos] for pos in self.overlapping(team_abbr, start, end)}
+
+    def were_teammates(self, player1_id, player2_id):
+        other = self.stints_of(player2_id)
+        for a in self.stints_of(player1_id):
+            for b in other:
+                if (self.stint_teams[a] == self.stint_teams[b]
+                        and self.starts[a] <= self.ends[b]
+                        and self.ends[a] >= self.starts[b]):
+                    return True
+        return False
+
+    def teammates(self, player_id):
+        found = set()
+        for pos in self.stints_of(player_id):
+            for other in self._overlapping_positions(self.stint_teams[pos], self.starts[pos], self.ends[pos]):
+                found.add(self.stint_players[other])
+        found.discard(player_id)
+        return found
+
+
+def load_stint_index(db_path=DB_PATH):
+    # from_connection reads the integer day columns, so migrate a text layout first
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        return StintIndex.from_connection(conn)
+    finally:
+        conn.close()
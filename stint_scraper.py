@@ -1,12 +1,18 @@
 import sqlite3
-import time
-from nba_api.stats.endpoints import playergamelog
-from nba_api.stats.library.parameters import SeasonAll
-from requests.exceptions import RequestException
 import pandas as pd
 
+from db_writer import WriterThread
+from ingest_engine import IngestEngine
+from job_journal import JobJournal
+from migrations import connect, migrate
+from nba_fetch import game_log, result_frame
+
 DB_PATH = "nba_players.db"
 MAX_RETRIES = 5
+REQUESTS_PER_SECOND = 0.5
+CONCURRENCY = 4
+GAME_DATE_FORMAT = "%b %d, %Y"  # e.g. "APR 10, 2024"
+JOB = 'stints'
 
 def get_existing_player_ids():
     conn = sqlite3.connect(DB_PATH)
@@ -24,99 +30,116 @@ def get_all_players():
     conn.close()
     return rows
 
-def safe_fetch_gamelog(player_id):
-    retries = 0
-    wait_time = 5
-    while retries < MAX_RETRIES:
-        try:
-            print(f"Fetching game log for player {player_id} (attempt {retries+1})...")
-            log = playergamelog.PlayerGameLog(player_id=player_id, season=SeasonAll.all)
-            df = log.get_data_frames()[0]
-            return df
-        except (RequestException, ValueError) as e:
-            print(f"Rate limit or network error for player {player_id}: {e}")
-            print(f"Waiting {wait_time} seconds before retrying...")
-            time.sleep(wait_time)
-            retries += 1
-            wait_time *= 2
-    print(f"❌ Failed to fetch game log for player {player_id} after {MAX_RETRIES} retries.")
-    return None
-
-
-def insert_stints_into_db(player_id, team_stints):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    for i, stint in enumerate(team_stints):
-        cur.execute("""
-            INSERT OR IGNORE INTO player_team_stints 
-            (player_id, team_abbr, stint_number, start_season, end_season, start_date, end_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            player_id,
-            stint["team_abbr"],
-            i + 1,
-            stint["start_season"],
-            stint["end_season"],
-            stint["start_date"],
-            stint["end_date"]
-        ))
-    conn.commit()
-    conn.close()
-
-def process_player(player_id):
-    df = safe_fetch_gamelog(player_id)
-    if df is None or df.empty:
-        return
-
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format='mixed')
-    df.sort_values("GAME_DATE", inplace=True)
+def fetch_gamelog(player_id):
+    return result_frame(game_log(player_id))
 
-    df["TEAM_ABBR"] = df["MATCHUP"].apply(lambda m: m.split(" ")[0] if "vs." in m or "@" in m else None)
 
-    team_stints = []
-    last_team = None
-    prev_game_date = None
-    prev_season = None
+def cached_gamelog(player_id):
+    raw = game_log(player_id, cache_only=True)
+    return None if raw is None else result_frame(raw)
 
-    for idx, row in df.iterrows():
-        team = row["TEAM_ABBR"]
-        game_date = row["GAME_DATE"]
-        season_id = str(row["SEASON_ID"])[-4:]
 
-        if team != last_team:
-            if last_team is not None and team_stints:
-                team_stints[-1]["end_date"] = prev_game_date.strftime("%Y-%m-%d")
-                team_stints[-1]["end_season"] = prev_season
-            team_stints.append({
-                "team_abbr": team,
-                "start_date": game_date.strftime("%Y-%m-%d"),
-                "start_season": season_id,
-                "end_date": None,
-                "end_season": None
-            })
-            last_team = team
-        prev_game_date = game_date
-        prev_season = season_id
-
-    if team_stints and prev_game_date:
-        team_stints[-1]["end_date"] = prev_game_date.strftime("%Y-%m-%d")
-        team_stints[-1]["end_season"] = prev_season
-
-    insert_stints_into_db(player_id, team_stints)
+def parse_game_dates(dates):
+    # One strptime format is far cheaper than guessing per row; fall back if it doesn't fit
+    try:
+        return pd.to_datetime(dates, format=GAME_DATE_FORMAT)
+    except ValueError:
+        return pd.to_datetime(dates, format='mixed')
 
+def detect_stints(df):
+    if df is None or df.empty:
+        return []
+
+    df = df.assign(GAME_DATE=parse_game_dates(df["GAME_DATE"])).sort_values("GAME_DATE")
+
+    # Team is the first word of the matchup ("LAL vs. BOS" / "LAL @ BOS"); '' when unknown
+    matchup = df["MATCHUP"]
+    has_opponent = matchup.str.contains("vs.", regex=False) | matchup.str.contains("@", regex=False)
+    team = matchup.str.split(" ", n=1).str[0].where(has_opponent, "")
+
+    # A new stint starts on the first game, on every team change and on every
+    # unknown-team game (the old row loop never matched those to the previous row)
+    new_stint = team.ne(team.shift()) | team.eq("")
+    games = pd.DataFrame({
+        "team": team,
+        "date": df["GAME_DATE"].dt.strftime("%Y-%m-%d"),
+        "season": df["SEASON_ID"].astype(str).str[-4:],
+        "stint": new_stint.cumsum()
+    })
+
+    grouped = games.groupby("stint", sort=True)
+    first = grouped.first()
+    last = grouped.last()
+
+    return [
+        {
+            "team_abbr": team_abbr or None,
+            "start_date": start_date,
+            "start_season": start_season,
+            "end_date": end_date,
+            "end_season": end_season
+        }
+        for team_abbr, start_date, start_season, end_date, end_season in zip(
+            first["team"], first["date"], first["season"], last["date"], last["season"]
+        )
+    ]
 
 def main():
-    existing_ids = get_existing_player_ids()
+    conn = connect(DB_PATH)
+    migrate(conn)
     all_players = get_all_players()
+    journal = JobJournal(conn)
+    # Players with stints were finished by runs from before the journal
+    journal.enqueue(JOB, [p[0] for p in all_players], done_ids=get_existing_player_ids())
+    pending_ids = set(journal.claim(JOB))
 
     print(f"Found {len(all_players)} total players.")
-    print(f"{len(existing_ids)} already processed.")
+    print(f"{len(all_players) - len(pending_ids)} already processed.")
 
-    for player_id, player_name in all_players:
-        if player_id in existing_ids:
-            continue
-        print(f"\nProcessing {player_name} ({player_id})...")
-        process_player(player_id)
+    stats = scrape_stints(conn, journal, [p for p in all_players if p[0] in pending_ids])
+    conn.close()
+    print(f"✅ Done. {stats}")
+
+def retry_players(player_list):
+    # player_list holds nba_api-style dicts, as the dead-letter retry passes them
+    conn = connect(DB_PATH)
+    migrate(conn)
+    stats = scrape_stints(conn, JobJournal(conn), [(p['id'], p['full_name']) for p in player_list])
+    conn.close()
+    print(f"✅ Done. {stats}")
+
+def scrape_stints(conn, journal, player_list):
+    # player_list holds (player_id, player_name) rows
+    writer_thread = WriterThread(DB_PATH).start()
+
+    def fetch(player):
+        player_id, player_name = player
+        print(f"Fetching game log for {player_name} ({player_id})...")
+        return fetch_gamelog(player_id)
+
+    def parse(player, df):
+        return detect_stints(df)
+
+    def store(writer, batch):
+        # Runs on the writer thread
+        for (player_id, _), team_stints in batch:
+            writer.add_stints(player_id, team_stints)
+            journal.done(writer, JOB, player_id)
+
+    def write(batch):
+        writer_thread.submit(store, batch)
+
+    def on_failure(player, error):
+        writer_thread.submit(journal.fail, JOB, player[0], error)
+
+    engine = IngestEngine(fetch, parse, write, rate=REQUESTS_PER_SECOND, concurrency=CONCURRENCY,
+                          max_retries=MAX_RETRIES, on_failure=on_failure,
+                          lookup=lambda player: cached_gamelog(player[0]))
+    stats = engine.run(player_list)
+    writer_thread.close()
+    print(f"📝 Writer: {writer_thread.stats()}")
+    print(f"📋 Journal: {journal.counts(JOB)}")
+    return stats
 
 if __name__ == "__main__":
     main()
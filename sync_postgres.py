@@ -0,0 +1,165 @@
+# sync_postgres.py
+#
+# Incremental sync from nba_players.db to the Supabase Postgres database.
+# Triggers (migrations step 6) log the key of every inserted, updated or
+# deleted players / player_team_stints row in sync_changes. A sync reads the
+# changes after the watermark Postgres last acknowledged, SYNC_BATCH at a
+# time: keys whose row still exists are upserted with its current values, the
+# rest are deleted, and the watermark moves in the same Postgres transaction.
+# Acknowledged changes are then pruned from SQLite. The cost follows the
+# number of changes, not the size of the database.
+#
+# Watermarks are per SQLite database (sync_source.id). A new or rebuilt
+# database has none yet, so its first sync is a full migrate_tables pass,
+# which also deletes the Postgres rows the new database no longer has.
+#
+#   python sync_postgres.py [db_path]
+
+import json
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from migrate_tables import TABLES, copy_rows, create_stage, merge_sql, postgres_url
+from migrate_tables import migrate as copy_tables
+from migrations import connect, migrate
+
+DB_PATH = 'nba_players.db'
+SYNC_BATCH = 5000  # changelog entries per Postgres transaction
+LOOKUP_CHUNK = 500  # keys per SQLite lookup
+
+WATERMARKS_SQL = """
+    CREATE TABLE IF NOT EXISTS sync_watermarks (
+        source_id TEXT PRIMARY KEY,
+        last_seq BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+SAVE_WATERMARK_SQL = """
+    INSERT INTO sync_watermarks (source_id, last_seq) VALUES (%s, %s)
+    ON CONFLICT (source_id) DO UPDATE SET last_seq = EXCLUDED.last_seq, updated_at = now()
+"""
+
+
+def read_watermark(pg_cur, source_id):
+    pg_cur.execute("SELECT last_seq FROM sync_watermarks WHERE source_id = %s", (source_id,))
+    row = pg_cur.fetchone()
+    return row[0] if row else None
+
+
+def pending_changes(conn, after, limit=SYNC_BATCH):
+    # -> (last seq read, {table: set of changed keys})
+    rows = conn.execute(
+        "SELECT seq, table_name, row_key FROM sync_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (after, limit)
+    ).fetchall()
+    changed = {}
+    for seq, table, row_key in rows:
+        changed.setdefault(table, set()).add(tuple(json.loads(row_key)))
+    return (rows[-1][0] if rows else after), changed
+
+
+def current_rows(conn, table, keys, columns, changed_keys):
+    # Current values of the changed rows that still exist, keyed by primary key
+    found = {}
+    changed_keys = list(changed_keys)
+    placeholder = f"({', '.join('?' * len(keys))})"
+    for i in range(0, len(changed_keys), LOOKUP_CHUNK):
+        chunk = changed_keys[i:i + LOOKUP_CHUNK]
+        rows = conn.execute(
+            f"SELECT {', '.join(columns.values())} FROM {table} "
+            f"WHERE ({', '.join(keys)}) IN (VALUES {', '.join([placeholder] * len(chunk))})",
+            [value for key in chunk for value in key]
+        ).fetchall()
+        for row in rows:
+            found[tuple(row[:len(keys)])] = row
+    return found
+
+
+def apply_changes(conn, pg_cur, changed):
+    # Ship one batch; returns (upserted, deleted)
+    upserted = deleted = 0
+    for table, keys, columns in TABLES:
+        if table not in changed:
+            continue
+        rows = current_rows(conn, table, keys, columns, changed[table])
+        gone = [key for key in changed[table] if key not in rows]
+        if rows:
+            stage = create_stage(pg_cur, table, columns)
+            copy_rows(pg_cur, stage, columns, rows.values())
+            pg_cur.execute(merge_sql(table, stage, keys, columns))
+        if gone:
+            execute_values(pg_cur, f"DELETE FROM {table} WHERE ({', '.join(keys)}) IN (VALUES %s)", gone)
+        upserted += len(rows)
+        deleted += len(gone)
+    return upserted, deleted
+
+
+def prune_changes(conn, up_to):
+    conn.execute("DELETE FROM sync_changes WHERE seq <= ?", (up_to,))
+    conn.commit()
+
+
+def sync(sqlite_path, pg_url):
+    conn = connect(sqlite_path)
+    migrate(conn)
+    source_id = conn.execute("SELECT id FROM sync_source").fetchone()[0]
+    pg_conn = psycopg2.connect(pg_url)
+    pg_cur = pg_conn.cursor()
+    pg_cur.execute(WATERMARKS_SQL)
+    pg_conn.commit()
+    stats = {'batches': 0, 'upserted': 0, 'deleted': 0}
+
+    try:
+        watermark = read_watermark(pg_cur, source_id)
+        if watermark is None:
+            # Everything logged so far is covered by the full copy that follows
+            watermark = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sync_changes").fetchone()[0]
+            print("🆕 No watermark for this database yet; running a full copy")
+            for table, result in copy_tables(sqlite_path, pg_url, restart=True).items():
+                if isinstance(result, Exception):
+                    raise result
+            pg_cur.execute(SAVE_WATERMARK_SQL, (source_id, watermark))
+            pg_conn.commit()
+            prune_changes(conn, watermark)
+            stats['full_copy'] = True
+
+        while True:
+            last_seq, changed = pending_changes(conn, watermark)
+            if not changed:
+                break
+            upserted, deleted = apply_changes(conn, pg_cur, changed)
+            pg_cur.execute(SAVE_WATERMARK_SQL, (source_id, last_seq))
+            pg_conn.commit()
+            prune_changes(conn, last_seq)
+            watermark = last_seq
+            stats['batches'] += 1
+            stats['upserted'] += upserted
+            stats['deleted'] += deleted
+            print(f"🔄 Synced through change {last_seq}: {upserted} upserted, {deleted} deleted")
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        pg_conn.close()
+        conn.close()
+    stats['watermark'] = watermark
+    return stats
+
+
+def main():
+    sqlite_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    pg_url = postgres_url()
+    if not pg_url:
+        print("❌ SUPABASE_DB_URL is not set (environment or .env)")
+        sys.exit(1)
+
+    started = time.time()
+    stats = sync(sqlite_path, pg_url)
+    print(f"✅ Sync done in {time.time() - started:.1f}s: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# team_history.py
+#
+# player_team_history.jsonl (written by import_json.py, not tracked) holds
+# one JSON object per line:
+#
+#   {"player_id": ..., "player_name": ..., "teams": [{"team_name": ..., "years": [1996, ...]}, ...]}
+#
+# HistoryWriter appends and flushes each player as soon as it's produced, so
+# a crash keeps everything written so far and a re-run skips those players
+# (by id: a few dozen names belong to more than one player).
+# iter_history() streams the records back one at a time, so readers start on
+# the first line and never hold the whole file. It also streams the old
+# single-array player_team_history.json.
+
+import json
+import os
+
+HISTORY_PATH = 'player_team_history.jsonl'
+READ_CHUNK = 64 * 1024  # characters per read of an old-style array file
+
+
+def _iter_array(f):
+    # Stream the elements of a top-level JSON array (the opening '[' is consumed)
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            entry, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            more = f.read(READ_CHUNK)
+            if not more:
+                if buffer:
+                    raise
+                return
+            buffer += more
+            continue
+        yield entry
+        buffer = buffer[end:]
+
+
+def iter_history(path=HISTORY_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == '[':
+            yield from _iter_array(f)
+            return
+        f.seek(0)
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A last line without its newline is a write cut short by a crash
+                if not line.endswith('\n'):
+                    return
+                raise
+
+
+class HistoryWriter:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            self._drop_partial_line()
+            self.done = {entry['player_id'] for entry in iter_history(path) if 'player_id' in entry}
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _drop_partial_line(self):
+        # Cut anything after the last newline: a record torn by a crash
+        with open(self.path, 'rb+') as f:
+            pos = f.seek(0, os.SEEK_END)
+            while pos > 0:
+                step = min(READ_CHUNK, pos)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    f.truncate(pos + newline + 1)
+                    return
+            f.truncate(0)
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        self.done.add(entry['player_id'])
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
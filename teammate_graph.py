@@ -0,0 +1,154 @@
+# teammate_graph.py
+#
+# Teammate graph built once from player_teams and kept in compact integer
+# arrays (CSR layout), so teammate checks never go back to SQLite.
+#
+#   player_ids[i]                          -> NBA player id of dense index i (sorted)
+#   neighbors[offsets[i]:offsets[i + 1]]   -> dense indices of i's teammates (sorted)
+#   groups[group_offsets[i]:group_offsets[i + 1]]
+#                                          -> (franchise, season) groups i played in (sorted)
+#   group_keys[g]                          -> (franchise_id, season) of group g
+
+from array import array
+from bisect import bisect_left
+
+from franchises import normalize_team_id
+from migrations import connect, migrate
+
+DB_PATH = 'nba_players.db'
+
+
+def _pack(rows):
+    # Turn a list of sorted int lists into (offsets, flat values)
+    offsets = array('i', [0])
+    values = array('i')
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def _contains(values, lo, hi, x):
+    i = bisect_left(values, x, lo, hi)
+    return i < hi and values[i] == x
+
+
+class TeammateGraph:
+    def __init__(self, player_ids, offsets, neighbors, group_offsets, groups, group_keys):
+        self.player_ids = player_ids
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.group_offsets = group_offsets
+        self.groups = groups
+        self.group_keys = group_keys
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (player_id, team_abbr, season) rows."""
+        group_index = {}
+        memberships = {}
+        for player_id, team_abbr, season in rows:
+            key = (normalize_team_id(team_abbr), season)
+            gid = group_index.setdefault(key, len(group_index))
+            memberships.setdefault(player_id, set()).add(gid)
+
+        player_ids = array('i', sorted(memberships))
+        dense = {pid: i for i, pid in enumerate(player_ids)}
+
+        rosters = [[] for _ in group_index]
+        for pid, gids in memberships.items():
+            for gid in gids:
+                rosters[gid].append(dense[pid])
+
+        adjacency = [set() for _ in player_ids]
+        for roster in rosters:
+            for i in roster:
+                adjacency[i].update(roster)
+        for i, mates in enumerate(adjacency):
+            mates.discard(i)
+
+        offsets, neighbors = _pack(sorted(mates) for mates in adjacency)
+        group_offsets, groups = _pack(sorted(memberships[pid]) for pid in player_ids)
+        group_keys = [None] * len(group_index)
+        for key, gid in group_index.items():
+            group_keys[gid] = key
+        return cls(player_ids, offsets, neighbors, group_offsets, groups, group_keys)
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        # franchise_id is resolved at ingest; rows from before that migration
+        # fall back to the team abbreviation and are normalized in from_rows
+        cursor.execute("""
+            SELECT pt.player_id, COALESCE(pt.franchise_id, t.team_abbr, pt.team_id), pt.season
+            FROM player_teams pt
+            LEFT JOIN teams t ON t.team_id = pt.team_id
+        """)
+        return cls.from_rows(cursor.fetchall())
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __contains__(self, player_id):
+        return self.index_of(player_id) is not None
+
+    def index_of(self, player_id):
+        i = bisect_left(self.player_ids, player_id)
+        if i < len(self.player_ids) and self.player_ids[i] == player_id:
+            return i
+        return None
+
+    def neighbors_of(self, index):
+        return self.neighbors[self.offsets[index]:self.offsets[index + 1]]
+
+    def groups_of(self, index):
+        return self.groups[self.group_offsets[index]:self.group_offsets[index + 1]]
+
+    def degree(self, player_id):
+        i = self.index_of(player_id)
+        return 0 if i is None else self.offsets[i + 1] - self.offsets[i]
+
+    def teammates(self, player_id):
+        i = self.index_of(player_id)
+        if i is None:
+            return []
+        return [self.player_ids[j] for j in self.neighbors_of(i)]
+
+    def are_teammates(self, player_id, other_id):
+        i = self.index_of(player_id)
+        j = self.index_of(other_id)
+        if i is None or j is None:
+            return False
+        return _contains(self.neighbors, self.offsets[i], self.offsets[i + 1], j)
+
+    def shared_groups(self, i, j):
+        # Merge two sorted group lists by dense index
+        a, b = self.groups_of(i), self.groups_of(j)
+        shared = []
+        x = y = 0
+        while x < len(a) and y < len(b):
+            if a[x] == b[y]:
+                shared.append(a[x])
+                x += 1
+                y += 1
+            elif a[x] < b[y]:
+                x += 1
+            else:
+                y += 1
+        return shared
+
+    def shared_seasons(self, player_id, other_id):
+        i = self.index_of(player_id)
+        j = self.index_of(other_id)
+        if i is None or j is None or i == j:
+            return []
+        return [self.group_keys[g] for g in self.shared_groups(i, j)]
+
+
+def load_teammate_graph(db_path=DB_PATH):
+    # from_cursor reads franchise_id, so bring an older schema up to date first
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        return TeammateGraph.from_cursor(conn.cursor())
+    finally:
+        conn.close()
@@ -0,0 +1,169 @@
+# teammate_paths.py
+#
+# "Degrees of separation" over the teammate graph: bidirectional BFS for the
+# shortest chain of teammates between two players, an avoid-these-players
+# variant, and k shortest chains (Yen's algorithm on top of the same BFS).
+#
+#   python teammate_paths.py "Kareem Abdul-Jabbar" "Victor Wembanyama" [k]
+
+import heapq
+import sys
+
+from graph_snapshot import load_snapshot
+from migrations import connect, migrate
+from teammate_graph import TeammateGraph
+
+DB_PATH = 'nba_players.db'
+
+
+def _bfs(graph, source, target, banned_nodes=frozenset(), banned_edges=frozenset()):
+    # Bidirectional BFS over dense indices; returns a list of indices or None
+    if source == target:
+        return [source]
+    parents = {source: None}
+    children = {target: None}
+    front, back = [source], [target]
+
+    while front and back:
+        # Always grow the smaller frontier by one full level
+        if len(front) > len(back):
+            front, back = back, front
+            parents, children = children, parents
+        next_front = []
+        meet = None
+        for u in front:
+            for v in graph.neighbors_of(u):
+                if v in parents or v in banned_nodes:
+                    continue
+                if (u, v) in banned_edges or (v, u) in banned_edges:
+                    continue
+                parents[v] = u
+                next_front.append(v)
+                if v in children and meet is None:
+                    meet = v
+        if meet is not None:
+            left = []
+            node = meet
+            while node is not None:
+                left.append(node)
+                node = parents[node]
+            left.reverse()
+            node = children[meet]
+            while node is not None:
+                left.append(node)
+                node = children[node]
+            if left[0] != source:
+                left.reverse()
+            return left
+        front = next_front
+    return None
+
+
+def _dense(graph, player_ids):
+    indices = set()
+    for pid in player_ids:
+        i = graph.index_of(pid)
+        if i is not None:
+            indices.add(i)
+    return indices
+
+
+def describe_path(graph, path):
+    """Turn dense indices into hops with the earliest shared team and season."""
+    hops = []
+    for a, b in zip(path, path[1:]):
+        franchise_id, season = min((graph.group_keys[g] for g in graph.shared_groups(a, b)),
+                                   key=lambda key: key[1])
+        hops.append({
+            "from_id": graph.player_ids[a],
+            "to_id": graph.player_ids[b],
+            "team": franchise_id,
+            "season": season,
+        })
+    return hops
+
+
+def shortest_path(graph, player_id, other_id, avoid=()):
+    source = graph.index_of(player_id)
+    target = graph.index_of(other_id)
+    if source is None or target is None:
+        return None
+    banned = _dense(graph, avoid) - {source, target}
+    if player_id in avoid or other_id in avoid:
+        return None
+    path = _bfs(graph, source, target, banned)
+    return None if path is None else describe_path(graph, path)
+
+
+def k_shortest_paths(graph, player_id, other_id, k=3, avoid=()):
+    source = graph.index_of(player_id)
+    target = graph.index_of(other_id)
+    if source is None or target is None or player_id in avoid or other_id in avoid:
+        return []
+    banned = frozenset(_dense(graph, avoid))
+
+    first = _bfs(graph, source, target, banned)
+    if first is None:
+        return []
+    found = [first]
+    seen = {tuple(first)}
+    candidates = []
+
+    while len(found) < k:
+        last = found[-1]
+        for i in range(len(last) - 1):
+            spur, root = last[i], last[:i + 1]
+            banned_edges = {(p[i], p[i + 1]) for p in found if len(p) > i + 1 and p[:i + 1] == root}
+            spur_path = _bfs(graph, spur, target, banned | set(root[:-1]), banned_edges)
+            if spur_path is None:
+                continue
+            path = root[:-1] + spur_path
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (len(path), path))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates)[1])
+
+    return [describe_path(graph, path) for path in found]
+
+
+def _load():
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return snapshot.graph, snapshot.find_player, snapshot.player_name
+    conn = connect(DB_PATH)
+    migrate(conn)
+    cursor = conn.cursor()
+    graph = TeammateGraph.from_cursor(cursor)
+    cursor.execute("SELECT player_id, player_name FROM players")
+    id_to_name = dict(cursor.fetchall())
+    conn.close()
+    name_to_id = {name.lower(): pid for pid, name in id_to_name.items()}
+    return graph, lambda name: name_to_id.get(name.strip().lower()), id_to_name.get
+
+
+def main():
+    if len(sys.argv) < 3:
+        print('Usage: python teammate_paths.py "Player One" "Player Two" [k]')
+        sys.exit(1)
+    graph, find_player, player_name = _load()
+    ids = [find_player(name) for name in sys.argv[1:3]]
+    for name, pid in zip(sys.argv[1:3], ids):
+        if pid is None:
+            print(f"❌ Player not found: {name}")
+            sys.exit(1)
+
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    paths = k_shortest_paths(graph, ids[0], ids[1], k)
+    if not paths:
+        print("No teammate chain found.")
+        return
+    for n, hops in enumerate(paths, start=1):
+        print(f"\n#{n}: {len(hops)} degree(s) of separation")
+        for hop in hops:
+            print(f"  {player_name(hop['from_id'])} → {player_name(hop['to_id'])} ({hop['team']} {hop['season']})")
+
+
+if __name__ == "__main__":
+    main()
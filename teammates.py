@@ -1,7 +1,9 @@
 # teammates.py
 
+from season_bitmask import SeasonHistory
+
 def parse_player_data(filepath):
-    data = {}
+    data = SeasonHistory()
     current_player = None
     with open(filepath, 'r') as f:
         for line in f:
@@ -10,21 +12,15 @@ def parse_player_data(filepath):
                 continue
             if ':' not in line:
                 current_player = line
-                data[current_player] = {}
+                data.add_player(current_player)
             else:
                 team, years_str = line.split(':', 1)
                 years = eval(years_str.strip())
-                data[current_player][team.strip()] = years
+                data.add_seasons(current_player, team.strip(), years)
     return data
 
 def were_teammates(player1, player2, data):
-    if player1 not in data or player2 not in data:
-        return []
-
-    p1 = {(team, year) for team, years in data[player1].items() for year in years}
-    p2 = {(team, year) for team, years in data[player2].items() for year in years}
-
-    return sorted(p1 & p2)
+    return data.shared_seasons(player1, player2)
 
 # --- Load data from file ---
 player_team_data = parse_player_data("players.txt")